@@ -3,6 +3,7 @@ import os
 import sys
 import logging
 import re
+import collections
 # 添加用户库路径
 sys.path.append('/home/jiang/.local/lib/python3.10/site-packages')
 sys.path.append('/usr/lib/python3/dist-packages')
@@ -25,12 +26,14 @@ from modules.llm.llm_service import LLMService
 from modules.retrieval.image_retrieval import ImageRetrieval
 from modules.retrieval.product_manager import ProductManager
 from modules.tts.tts_service import TTSService
+from modules.asr.vad_segmenter import VADSegmenter
+from modules.asr.ring_buffer import AudioRingBuffer
+from modules.asr.keyword_spotter import CommandSpotter, DEFAULT_KWS_MODEL_DIR
 from gui.popup_image import ProductPopup
 from gui.window_manager import WindowManager
 
 # ========== ASR 模块 ==========
 import sounddevice as sd
-import queue
 import numpy as np
 import torch
 import sherpa_onnx
@@ -57,6 +60,57 @@ TTS_MODEL_DIR = "/mnt/data/modelscope_cache/hub/pengzhendong"  # 你本地的 TT
 # 修改端口号，避免端口冲突
 SERVER_PORT = 54713
 
+# 语音分段（VAD）参数
+ASR_VAD_AGGRESSIVENESS = 2     # webrtcvad 灵敏度 0~3
+ASR_VAD_HANGOVER_MS = 500      # 尾部静音超过该时长即认为一句话结束
+ASR_MIN_SPEECH_MS = 250        # 过短的语音视为噪声
+ASR_MAX_UTTERANCE_S = 8.0      # 单句最大时长
+ASR_RING_BUFFER_S = 10         # 录音环形缓冲区容量（秒）
+
+# 播报期间屏蔽麦克风，避免把自己的 TTS 声音送入识别
+ASR_TTS_GATE = True
+ASR_TTS_GATE_TAIL_MS = 300     # 播放结束后继续屏蔽的时长（扬声器余音）
+ASR_BARGE_IN = False           # 是否允许用户大声插话打断播报
+ASR_BARGE_IN_RMS = 0.08        # 插话判定的音量阈值，需明显高于扬声器回声
+ASR_BARGE_IN_MS = 300          # 持续超过该时长的大音量才判定为插话
+
+# 流式识别（可选）：使用 sherpa-onnx 在线识别器，边说边出中间结果
+ASR_STREAMING = False
+ASR_STREAMING_MODEL_DIR = "/mnt/data/modelscope_cache/hub/csukuangfj/sherpa-onnx-streaming-zipformer-bilingual-zh-en-2023-02-20"
+ASR_PARTIAL_STABLE_COUNT = 2   # 中间结果连续多少次指向同一动作才提前执行
+
+# 取消购买的表达
+CANCEL_PHRASES = ["不想买了", "不想要了", "取消", "不要了", "不买了", "算了", "我不要了"]
+
+# 命令词快速通道：常驻关键词检测，命中后无需等待完整识别
+KWS_ENABLED = True
+KWS_MODEL_DIR = DEFAULT_KWS_MODEL_DIR
+KWS_COMMANDS = {
+    "我不要了": "cancel",
+    "不要了": "cancel",
+    "取消": "cancel",
+    "算了": "cancel",
+    "关闭": "close",
+}
+
+# 常用播报语句
+GREETING_TEXT = "亲亲你想买什么"
+CANCEL_TEXT = "好的，已为您取消"
+SIZE_QUESTION_TEXT = "请问您需要什么尺码？"
+DEFAULT_SIZES = ["S", "M", "L", "XL"]
+
+# TTS 预合成：启动时和商品目录变化时，在后台把常用语句合成到语音缓存
+TTS_PREWARM = True
+TTS_PREWARM_INTERVAL_S = 1.0   # 两句之间的最小间隔，避免与实时播报争抢 CPU
+CATALOG_POLL_S = 30            # 检查商品规格文件变化的间隔（秒）
+
+# 模板播报：商品介绍按 "为您找到/商品名/价格/价格数字/描述/询问尺码" 片段分别合成后拼接，
+# 各片段合成一次即可反复使用，CPU 上也能即时播报
+TTS_FRAGMENT_SPLICING = True
+
+# 播报请求合并窗口（秒）：窗口内先后到达的重复或扩展播报（如先播介绍、紧接着播介绍+询问尺码）只合成一次
+TTS_COALESCE_WINDOW_S = 0.08
+
 # -----------------------------
 # 初始化模块
 # -----------------------------
@@ -82,7 +136,8 @@ except Exception as e:
 
 # TTS 服务
 try:
-    tts_service = TTSService(engine="local", model_path=TTS_MODEL_DIR)  # 使用本地TTS模型
+    tts_service = TTSService(engine="local", model_path=TTS_MODEL_DIR,
+                             coalesce_window=TTS_COALESCE_WINDOW_S)  # 使用本地TTS模型
     logger.info("✅ TTSService 加载成功")
 except Exception as e:
     logger.error(f"⚠️ TTS 模块加载失败: {e}")
@@ -109,6 +164,92 @@ gui_queue = python_queue.Queue()
 root = tk.Tk()
 root.withdraw()  # 隐藏根窗口
 
+# -----------------------------
+# 播报文本
+# -----------------------------
+def product_intro_text(product: dict) -> str:
+    return f"为您找到{product['name']}, 价格{product['price']}, {product['description']}"
+
+def ask_size_text(product: dict) -> str:
+    return product_intro_text(product) + SIZE_QUESTION_TEXT
+
+def size_selected_text(size: str) -> str:
+    return f"已为您选择{size}码"
+
+def product_intro_fragments(product: dict) -> list:
+    """
+    与 product_intro_text 对应的模板片段
+    """
+    return ["为您找到", f"{product['name']},", "价格", f"{product['price']},", product['description']]
+
+def speak_product(product: dict, ask_size: bool, filename: str):
+    """
+    播报商品介绍（可选追加询问尺码）
+    """
+    if TTS_FRAGMENT_SPLICING:
+        fragments = product_intro_fragments(product) + ([SIZE_QUESTION_TEXT] if ask_size else [])
+        tts_service.speak_fragments(fragments, filename)
+    else:
+        tts_service.speak_and_play(ask_size_text(product) if ask_size else product_intro_text(product), filename)
+
+# -----------------------------
+# TTS 预合成
+# -----------------------------
+def prewarm_phrases() -> list:
+    """
+    可提前合成的语句：问候、取消、尺码确认，以及每个商品的介绍和询问尺码
+    """
+    sizes = list(DEFAULT_SIZES)
+    for product in product_manager.products.values():
+        sizes.extend(s for s in product.get("sizes", {}) if s not in sizes)
+
+    phrases = [GREETING_TEXT, CANCEL_TEXT] + [size_selected_text(s) for s in sizes]
+    products = list(product_manager.products.values())
+    if TTS_FRAGMENT_SPLICING:
+        phrases.append(SIZE_QUESTION_TEXT)
+        for p in products:
+            phrases += product_intro_fragments(p)
+    else:
+        phrases += [ask_size_text(p) for p in products]
+        phrases += [product_intro_text(p) for p in products]
+    return phrases
+
+def start_tts_prewarm():
+    if TTS_PREWARM and tts_service:
+        phrases = prewarm_phrases()
+        logger.info(f"🔥 后台预合成 {len(phrases)} 条常用语句")
+        tts_service.prewarm(phrases, min_interval=TTS_PREWARM_INTERVAL_S)
+
+def catalog_signature():
+    """
+    商品规格文件的 (文件名, 修改时间, 大小) 列表，用于检测目录变化
+    """
+    if not os.path.isdir(SPEC_DIR):
+        return ()
+    signature = []
+    for name in sorted(os.listdir(SPEC_DIR)):
+        if name.endswith(".json"):
+            st = os.stat(os.path.join(SPEC_DIR, name))
+            signature.append((name, st.st_mtime, st.st_size))
+    return tuple(signature)
+
+def watch_catalog():
+    """
+    商品规格变化时重新加载商品并重新预合成
+    """
+    signature = catalog_signature()
+    while True:
+        time.sleep(CATALOG_POLL_S)
+        try:
+            current = catalog_signature()
+            if current != signature:
+                signature = current
+                product_manager.reload()
+                logger.info(f"🔄 商品目录已更新，共 {len(product_manager.products)} 个商品")
+                start_tts_prewarm()
+        except Exception as e:
+            logger.error(f"⚠️ 检查商品目录失败: {e}")
+
 # -----------------------------
 # 弹窗显示函数
 # -----------------------------
@@ -133,8 +274,7 @@ def show_product_popup(product_info: dict):
     if tts_service:
         try:
             # 构造商品介绍文本
-            product_intro = f"为您找到{product_info['name']}, 价格{product_info['price']}, {product_info['description']}"
-            tts_service.speak_and_play(product_intro, f"product_{product_info['name']}.wav")
+            speak_product(product_info, False, f"product_{product_info['name']}.wav")
         except Exception as e:
             logger.error(f"⚠️ TTS播报失败: {e}")
     return
@@ -263,6 +403,25 @@ def fuzzy_match_product(query: str):
     
     return None
 
+# -----------------------------
+# 取消购买
+# -----------------------------
+def cancel_current_product():
+    close_current_popup()
+    cancel_text = CANCEL_TEXT
+    logger.info(f"🔄 {cancel_text}")
+    # 添加TTS语音播报
+    if tts_service:
+        try:
+            # 确保文本不为空
+            if cancel_text and cancel_text.strip():
+                tts_service.speak_and_play(cancel_text, "cancel.wav")
+            else:
+                logger.warning("⚠️ TTS取消购买文本为空，跳过播报")
+        except Exception as e:
+            logger.error(f"⚠️ TTS播报失败: {e}")
+    return {"status": "cancelled"}
+
 # -----------------------------
 # 商品检索逻辑
 # -----------------------------
@@ -296,22 +455,8 @@ def find_product_by_query(query_text: str):
         return None
     
     # 检查是否是取消购买的表达
-    cancel_phrases = ["不想买了", "不想要了", "取消", "不要了", "不买了", "算了", "我不要了"]
-    if any(cancel_phrase in query_text for cancel_phrase in cancel_phrases):
-        close_current_popup()
-        cancel_text = "好的，已为您取消"
-        logger.info(f"🔄 {cancel_text}")
-        # 添加TTS语音播报
-        if tts_service:
-            try:
-                # 确保文本不为空
-                if cancel_text and cancel_text.strip():
-                    tts_service.speak_and_play(cancel_text, "cancel.wav")
-                else:
-                    logger.warning("⚠️ TTS取消购买文本为空，跳过播报")
-            except Exception as e:
-                logger.error(f"⚠️ TTS播报失败: {e}")
-        return {"status": "cancelled"}
+    if any(cancel_phrase in query_text for cancel_phrase in CANCEL_PHRASES):
+        return cancel_current_product()
 
     # 如果正在等待用户选择尺码
     if conversation_state["waiting_for_size"] and conversation_state["current_product"]:
@@ -340,14 +485,14 @@ def find_product_by_query(query_text: str):
             close_current_popup()
             show_product_popup(product)
             conversation_state["waiting_for_size"] = False
-            size_selected_text = f"已为您选择{size}码"
-            logger.info(f"✅ {size_selected_text}")
+            selected_text = size_selected_text(size)
+            logger.info(f"✅ {selected_text}")
             # 添加TTS语音播报
             if tts_service:
                 try:
                     # 确保文本不为空
-                    if size_selected_text and size_selected_text.strip():
-                        tts_service.speak_and_play(size_selected_text, "size_selected.wav")
+                    if selected_text and selected_text.strip():
+                        tts_service.speak_and_play(selected_text, "size_selected.wav")
                     else:
                         logger.warning("⚠️ TTS尺码选择文本为空，跳过播报")
                 except Exception as e:
@@ -369,13 +514,12 @@ def find_product_by_query(query_text: str):
         conversation_state["current_product"] = matched_product
         conversation_state["waiting_for_size"] = True
         # 构造商品介绍文本
-        product_intro = f"为您找到{matched_product['name']}, 价格{matched_product['price']}, {matched_product['description']}"
-        ask_size_text = product_intro + "请问您需要什么尺码？"
-        logger.info(f"📏 {ask_size_text}")
+        question_text = ask_size_text(matched_product)
+        logger.info(f"📏 {question_text}")
         # 添加TTS语音播报
         if tts_service:
             try:
-                tts_service.speak_and_play(ask_size_text, f"ask_size_{matched_product['name']}.wav")
+                speak_product(matched_product, True, f"ask_size_{matched_product['name']}.wav")
             except Exception as e:
                 logger.error(f"⚠️ TTS播报失败: {e}")
         return matched_product
@@ -400,15 +544,14 @@ def find_product_by_query(query_text: str):
                         conversation_state["current_product"] = product_info
                         conversation_state["waiting_for_size"] = True
                         # 构造商品介绍文本
-                        product_intro = f"为您找到{product_info['name']}, 价格{product_info['price']}, {product_info['description']}"
-                        ask_size_text = product_intro + "请问您需要什么尺码？"
-                        logger.info(f"📏 {ask_size_text}")
+                        question_text = ask_size_text(product_info)
+                        logger.info(f"📏 {question_text}")
                         # 添加TTS语音播报
                         if tts_service:
                             try:
                                 # 确保文本不为空
-                                if ask_size_text and ask_size_text.strip():
-                                    tts_service.speak_and_play(ask_size_text, f"ask_size_{product_info['name']}.wav")
+                                if question_text and question_text.strip():
+                                    speak_product(product_info, True, f"ask_size_{product_info['name']}.wav")
                                 else:
                                     logger.warning("⚠️ TTS图像检索商品询问尺码文本为空，跳过播报")
                             except Exception as e:
@@ -446,36 +589,330 @@ def init_asr_recognizer():
         logger.error(f"❌ 初始化 ASR 失败: {e}")
         return None
 
+# -----------------------------
+# 命令词检测（KWS）初始化
+# -----------------------------
+def init_command_spotter():
+    if not KWS_ENABLED:
+        return None
+    if not os.path.exists(KWS_MODEL_DIR):
+        logger.warning(f"⚠️ KWS 模型路径不存在: {KWS_MODEL_DIR}，命令词仅通过完整识别处理")
+        return None
+    try:
+        spotter = CommandSpotter(KWS_MODEL_DIR, KWS_COMMANDS, num_threads=1)
+        logger.info(f"✅ 命令词检测加载成功: {list(KWS_COMMANDS)}")
+        return spotter
+    except Exception as e:
+        logger.error(f"❌ 初始化命令词检测失败: {e}")
+        return None
+
+def handle_command_keyword(keyword, action):
+    logger.info(f"⚡ 命令词: {keyword}")
+    if action == "cancel":
+        cancel_current_product()
+    elif action == "close":
+        close_current_popup()
+
 # -----------------------------
 # 实时语音识别线程
 # -----------------------------
-def start_asr_loop(recognizer):
-    q_audio = queue.Queue()
-    samplerate = 16000
+def should_drop_audio(segment, barge_state, samplerate=16000):
+    """
+    播报期间丢弃麦克风音频；开启插话检测时，用户持续大声说话会打断播报并恢复识别
+    """
+    if not (ASR_TTS_GATE and tts_service and tts_service.is_playing(ASR_TTS_GATE_TAIL_MS / 1000)):
+        barge_state["loud"] = 0
+        return False
+    if ASR_BARGE_IN and len(segment):
+        rms = float(np.sqrt(np.mean(segment * segment)))
+        barge_state["loud"] = barge_state["loud"] + len(segment) if rms > ASR_BARGE_IN_RMS else 0
+        if barge_state["loud"] >= samplerate * ASR_BARGE_IN_MS / 1000:
+            logger.info("🗣️ 检测到用户插话，停止播报")
+            tts_service.stop_playback()
+            barge_state["loud"] = 0
+            return False
+    return True
+
+def make_gated_audio_callback(rings, samplerate=16000):
+    """
+    录音回调：在采集时（而不是识别线程读取时）判断是否处于播报期间
+    - 播报期间的音频不写入缓冲区，识别变慢时也不会把回声或用户先前的话误判
+    - 每次开始屏蔽时在各缓冲区的当前写入位置记录一个断点，读取端读到断点时丢弃未完成的语句
+    rings 为 [(AudioRingBuffer, 断点队列)]，同一路音频可以分发给多个处理线程
+    """
+    barge_state = {"loud": 0, "gated": False}
 
     def audio_callback(indata, frames, time_, status):
         if status:
             logger.warning(status)
-        q_audio.put(indata.copy())
+        samples = indata[:, 0]
+        if should_drop_audio(samples, barge_state, samplerate):
+            if not barge_state["gated"]:
+                barge_state["gated"] = True
+                for ring, gaps in rings:
+                    gaps.append(ring.write_position)
+            return
+        barge_state["gated"] = False
+        for ring, _ in rings:
+            ring.write(samples)
+
+    return audio_callback
+
+def read_until_gap(ring, gaps):
+    """
+    返回下一个播报断点之前的可读音频视图；读取位置正好在断点上时弹出断点并返回 None
+    """
+    if gaps and gaps[0] <= ring.read_position:
+        gaps.popleft()
+        return None
+    return ring.views(gaps[0] - ring.read_position if gaps else None)
+
+def run_command_spotter(spotter, ring, gaps, hits, chunk=1600):
+    """
+    命令词检测线程：与完整识别并行处理同一路音频，命令响应不再排在整句识别之后
+    命中时记录命中位置（累计采样点，精度为 chunk），识别线程据此丢弃包含该命令词的语句
+    """
+    while True:
+        try:
+            if not ring.wait(timeout=0.5) and not gaps:
+                continue
+            segments = read_until_gap(ring, gaps)
+            if segments is None:
+                spotter.reset()
+                continue
+            for segment in segments:
+                for start in range(0, len(segment), chunk):
+                    piece = segment[start:start + chunk]
+                    detected = spotter.accept(piece)
+                    ring.consume(len(piece))
+                    for keyword, action in detected:
+                        hits.append(ring.read_position)
+                        handle_command_keyword(keyword, action)
+        except Exception as e:
+            logger.error(f"[KWS] 错误: {e}")
+            time.sleep(1)
+
+def wait_for_spotter(ring, position, timeout=0.5):
+    """
+    等待命令词检测线程处理到指定位置（命令词检测很快，通常无需等待）
+    """
+    deadline = time.time() + timeout
+    while ring.read_position < position and time.time() < deadline:
+        time.sleep(0.005)
+
+def utterance_has_command(hits, start, end):
+    """
+    [start, end] 区间（累计采样点）内是否命中过命令词；同时清理已过期的命中记录
+    """
+    while hits and hits[0] < start:
+        hits.popleft()
+    found = False
+    while hits and hits[0] <= end:
+        hits.popleft()
+        found = True
+    return found
+
+def decode_utterance(recognizer, samplerate, wave):
+    # 使用正确的ASR调用方式
+    stream = recognizer.create_stream()
+    stream.accept_waveform(samplerate, wave)
+    recognizer.decode_stream(stream)
+    return stream.result.text
+
+def start_asr_loop(recognizer, spotter=None):
+    samplerate = 16000
+    # 录音回调直接写入固定容量的环形缓冲区，识别线程通过零拷贝视图读取
+    ring = AudioRingBuffer(capacity=samplerate * ASR_RING_BUFFER_S)
+    # 按语音活动切分：检测到尾部静音立即识别整句，静音不送入识别器
+    segmenter = VADSegmenter(
+        sample_rate=samplerate,
+        aggressiveness=ASR_VAD_AGGRESSIVENESS,
+        hangover_ms=ASR_VAD_HANGOVER_MS,
+        min_speech_ms=ASR_MIN_SPEECH_MS,
+        max_utterance_s=ASR_MAX_UTTERANCE_S
+    )
+    # 播报期间的音频在录音回调中就被丢弃，只留下断点
+    gaps = collections.deque()
+    rings = [(ring, gaps)]
+    # 命令词检测在独立线程中处理同一路音频（各自的缓冲区），不受整句识别耗时影响
+    kws_ring = None
+    command_hits = collections.deque()
+    if spotter:
+        kws_ring = AudioRingBuffer(capacity=samplerate * ASR_RING_BUFFER_S)
+        kws_gaps = collections.deque()
+        rings.append((kws_ring, kws_gaps))
+        threading.Thread(target=run_command_spotter, args=(spotter, kws_ring, kws_gaps, command_hits),
+                         daemon=True).start()
+    audio_callback = make_gated_audio_callback(rings, samplerate)
 
     logger.info("🎙️ 开始实时语音监听（Ctrl+C 退出）")
-    with sd.InputStream(samplerate=samplerate, channels=1, callback=audio_callback):
-        buffer = np.zeros((0,), dtype=np.float32)
+    with sd.InputStream(samplerate=samplerate, channels=1, dtype="float32", callback=audio_callback):
+        while True:
+            try:
+                if not ring.wait(timeout=0.5) and not gaps:
+                    continue
+                segments = read_until_gap(ring, gaps)
+                if segments is None:
+                    # 播报打断了正在说的话，清掉未完成的语句
+                    segmenter.reset()
+                    continue
+                for segment in segments:
+                    # start / end 为该句在录音流中的累计采样点位置，与命令词命中位置可直接比较
+                    for wave, start, end in segmenter.process_with_ranges(segment):
+                        # 命令词已由检测线程处理过的语句不再送入识别器，避免同一命令执行两次
+                        if kws_ring is not None:
+                            wait_for_spotter(kws_ring, end)
+                            if utterance_has_command(command_hits, start, end):
+                                continue
+                        text = decode_utterance(recognizer, samplerate, wave)
+                        if text.strip():
+                            logger.info(f"🗣️ 识别到语音: {text.strip()}")
+                            find_product_by_query(text.strip())
+                    ring.consume(len(segment))
+                if ring.overruns:
+                    logger.warning(f"[ASR] 识别跟不上录音，已丢弃 {ring.overruns} 个采样点")
+                    ring.overruns = 0
+            except KeyboardInterrupt:
+                logger.info("🛑 停止语音识别")
+                break
+            except Exception as e:
+                logger.error(f"[ASR] 错误: {e}")
+                time.sleep(1)
+
+# -----------------------------
+# 流式语音识别（在线识别器 + 中间结果提前响应）
+# -----------------------------
+def _find_model_file(model_dir, prefix):
+    # 优先使用 int8 量化模型以降低 CPU 开销
+    candidates = sorted(f for f in os.listdir(model_dir) if f.startswith(prefix) and f.endswith(".onnx"))
+    int8 = [f for f in candidates if ".int8." in f]
+    chosen = (int8 or candidates or [None])[0]
+    return os.path.join(model_dir, chosen) if chosen else None
+
+def init_online_asr_recognizer():
+    if not os.path.exists(ASR_STREAMING_MODEL_DIR):
+        logger.error(f"❌ 流式 ASR 模型路径不存在: {ASR_STREAMING_MODEL_DIR}")
+        return None
+    try:
+        recognizer = sherpa_onnx.OnlineRecognizer.from_transducer(
+            tokens=os.path.join(ASR_STREAMING_MODEL_DIR, "tokens.txt"),
+            encoder=_find_model_file(ASR_STREAMING_MODEL_DIR, "encoder"),
+            decoder=_find_model_file(ASR_STREAMING_MODEL_DIR, "decoder"),
+            joiner=_find_model_file(ASR_STREAMING_MODEL_DIR, "joiner"),
+            num_threads=2,
+            sample_rate=16000,
+            feature_dim=80,
+            decoding_method="greedy_search",
+            enable_endpoint_detection=True,
+            rule1_min_trailing_silence=2.4,
+            rule2_min_trailing_silence=ASR_VAD_HANGOVER_MS / 1000,
+            rule3_min_utterance_length=ASR_MAX_UTTERANCE_S,
+            provider="cuda" if torch.cuda.is_available() else "cpu"
+        )
+        logger.info("✅ 流式 ASR 模型加载成功")
+        return recognizer
+    except Exception as e:
+        logger.error(f"❌ 初始化流式 ASR 失败: {e}")
+        return None
+
+def resolve_query_action(query_text: str, waiting_for_size=None):
+    """
+    判断一段（可能不完整的）识别文本是否已经能确定动作，不产生任何副作用
+    返回 ("cancel", None)、("product", 商品名) 或 None
+    waiting_for_size 默认取当前对话状态；比较最终结果时传入中间结果当时的状态
+    """
+    if waiting_for_size is None:
+        waiting_for_size = conversation_state["waiting_for_size"]
+    if any(cancel_phrase in query_text for cancel_phrase in CANCEL_PHRASES):
+        return ("cancel", None)
+    # 等待尺码时的回答交给最终结果处理，避免把不完整的中间结果当成尺码
+    if waiting_for_size or len(query_text.strip()) < 4:
+        return None
+    matched = fuzzy_match_product(query_text)
+    if matched:
+        return ("product", matched["name"])
+    return None
+
+def new_partial_state():
+    """
+    一句话的中间结果处理状态
+    """
+    return {"candidate": None, "stable": 0, "early_action": None, "early_waiting_for_size": False}
+
+def handle_partial_result(text: str, state: dict):
+    """
+    处理中间结果：同一动作连续出现 ASR_PARTIAL_STABLE_COUNT 次后提前执行
+    """
+    if state["early_action"] is not None:
+        return
+    waiting_for_size = conversation_state["waiting_for_size"]
+    action = resolve_query_action(text, waiting_for_size)
+    if action is None or action != state["candidate"]:
+        state["candidate"] = action
+        state["stable"] = 1 if action else 0
+        return
+    state["stable"] += 1
+    if state["stable"] >= ASR_PARTIAL_STABLE_COUNT:
+        logger.info(f"⚡ 根据中间结果提前响应: {text}")
+        state["early_action"] = action
+        # 提前执行会改变对话状态（例如开始等待尺码），记录执行前的状态供最终结果比较
+        state["early_waiting_for_size"] = waiting_for_size
+        find_product_by_query(text)
+
+def handle_final_result(text: str, state: dict):
+    """
+    处理最终结果：与提前执行的动作一致则跳过，否则按最终结果纠正
+    """
+    if not text:
+        return
+    logger.info(f"🗣️ 识别到语音: {text}")
+    if (state["early_action"] is not None and
+            resolve_query_action(text, state["early_waiting_for_size"]) == state["early_action"]):
+        return
+    if state["early_action"] is not None:
+        logger.info(f"🔁 最终结果与提前响应不一致，重新处理: {text}")
+    find_product_by_query(text)
+
+def start_streaming_asr_loop(recognizer):
+    samplerate = 16000
+    ring = AudioRingBuffer(capacity=samplerate * ASR_RING_BUFFER_S)
+    stream = recognizer.create_stream()
+    state = new_partial_state()
+    last_text = ""
+    # 播报期间的音频在录音回调中就被丢弃，只留下断点
+    gaps = collections.deque()
+    audio_callback = make_gated_audio_callback([(ring, gaps)], samplerate)
+
+    logger.info("🎙️ 开始流式语音监听（Ctrl+C 退出）")
+    with sd.InputStream(samplerate=samplerate, channels=1, dtype="float32", callback=audio_callback):
         while True:
             try:
-                data = q_audio.get()
-                buffer = np.concatenate([buffer, data[:, 0]])
-                if len(buffer) > samplerate * 5:  # 每 5 秒识别一次
-                    wave = buffer[:samplerate * 5]
-                    buffer = buffer[samplerate * 5:]
-                    # 使用正确的ASR调用方式
-                    stream = recognizer.create_stream()
-                    stream.accept_waveform(samplerate, wave)
+                if not ring.wait(timeout=0.5) and not gaps:
+                    continue
+                segments = read_until_gap(ring, gaps)
+                if segments is None:
+                    # 播报打断了正在说的话，丢弃未完成语句的中间结果
+                    recognizer.reset(stream)
+                    state = new_partial_state()
+                    last_text = ""
+                    continue
+                for segment in segments:
+                    stream.accept_waveform(samplerate, segment)
+                    ring.consume(len(segment))
+                while recognizer.is_ready(stream):
                     recognizer.decode_stream(stream)
-                    text = stream.result.text
-                    if text.strip():
-                        logger.info(f"🗣️ 识别到语音: {text.strip()}")
-                        find_product_by_query(text.strip())
+
+                result = recognizer.get_result(stream)
+                text = (result if isinstance(result, str) else result.text).strip()
+                if text and text != last_text:
+                    last_text = text
+                    handle_partial_result(text, state)
+
+                if recognizer.is_endpoint(stream):
+                    handle_final_result(text, state)
+                    recognizer.reset(stream)
+                    state = new_partial_state()
+                    last_text = ""
             except KeyboardInterrupt:
                 logger.info("🛑 停止语音识别")
                 break
@@ -502,14 +939,19 @@ async def handle_voice_query(text: str):
 if __name__ == "__main__":
     logger.info("🚀 DuoMotai 智能客服系统启动中...")
 
-    recognizer = init_asr_recognizer()
-    if recognizer:
-        threading.Thread(target=start_asr_loop, args=(recognizer,), daemon=True).start()
+    online_recognizer = init_online_asr_recognizer() if ASR_STREAMING else None
+    if online_recognizer:
+        recognizer = online_recognizer
+        threading.Thread(target=start_streaming_asr_loop, args=(online_recognizer,), daemon=True).start()
+    else:
+        recognizer = init_asr_recognizer()
+        if recognizer:
+            threading.Thread(target=start_asr_loop, args=(recognizer, init_command_spotter()), daemon=True).start()
 
     # 启动后立即显示初始问候
     def initial_greeting():
         time.sleep(1)  # 等待系统初始化完成
-        greeting_text = "亲亲你想买什么"
+        greeting_text = GREETING_TEXT
         logger.info(f"📢 初始问候: {greeting_text}")
         # 添加语音播报功能
         if tts_service:
@@ -521,6 +963,10 @@ if __name__ == "__main__":
     greeting_thread = threading.Thread(target=initial_greeting, daemon=True)
     greeting_thread.start()
 
+    # 后台预合成常用语句，并在商品目录变化时重新预合成
+    start_tts_prewarm()
+    threading.Thread(target=watch_catalog, daemon=True).start()
+
     # 修改端口号，避免端口冲突
     config = uvicorn.Config(app, host="0.0.0.0", port=SERVER_PORT)
     server = uvicorn.Server(config)
@@ -744,7 +1190,7 @@ def play_welcome_message():
     """
     if tts_service:
         try:
-            welcome_text = "亲亲你想买什么"
+            welcome_text = GREETING_TEXT
             tts_service.speak_and_play(welcome_text, "welcome.wav")
         except Exception as e:
             logger.error(f"⚠️ 播放欢迎消息失败: {e}")
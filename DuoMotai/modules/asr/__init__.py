@@ -1,4 +1,22 @@
 # __init__.py
 # asr模块初始化
-from .asr_service import ASRService
-from .asr_utils import load_audio, normalize_audio
+# 流式处理组件直接导入；ASRService 与音频工具依赖 torch/modelscope/librosa，首次访问时才导入，
+# 只使用缓冲区或命令词检测的程序（例如 find_something）不必加载这些依赖
+import importlib
+
+from .vad_segmenter import VADSegmenter
+from .ring_buffer import AudioRingBuffer
+from .keyword_spotter import CommandSpotter, DEFAULT_KWS_MODEL_DIR
+from .noise_suppressor import StreamingNoiseSuppressor
+
+_LAZY_IMPORTS = {
+    "ASRService": ".asr_service",
+    "load_audio": ".asr_utils",
+    "normalize_audio": ".asr_utils",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,95 @@
+# modules/asr/keyword_spotter.py
+import os
+import tempfile
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# 中文命令词检测模型（sherpa-onnx zipformer KWS），DuoMotai 与 find_something 共用
+DEFAULT_KWS_MODEL_DIR = "/mnt/data/modelscope_cache/hub/pkufool/sherpa-onnx-kws-zipformer-wenetspeech-3.3M-2024-01-01"
+
+class CommandSpotter:
+    """
+    固定命令词的关键词检测（Keyword Spotting）
+    - 基于 sherpa-onnx KeywordSpotter 和小型 zipformer KWS 模型，常驻运行、CPU 占用很低
+    - 与完整识别器并行（或先于它）处理同一份音频，命中命令词后在几百毫秒内返回
+    - 命令词表在初始化时通过 text2token 转换为拼音 token，无需手工编写 keywords 文件
+    """
+    def __init__(self, model_dir: str, commands: Dict[str, str], sample_rate: int = 16000,
+                 num_threads: int = 1, keywords_score: float = 1.5, keywords_threshold: float = 0.25,
+                 provider: str = "cpu"):
+        """
+        :param model_dir: KWS 模型目录（包含 encoder/decoder/joiner 与 tokens.txt）
+        :param commands: {命令词: 动作}，例如 {"我不要了": "cancel", "关闭": "close"}
+        :param keywords_score: 命令词加权，越大越容易触发
+        :param keywords_threshold: 触发阈值，越小越容易触发
+        """
+        import sherpa_onnx
+
+        self.sample_rate = sample_rate
+        self.commands = dict(commands)
+        tokens = os.path.join(model_dir, "tokens.txt")
+        self._keywords_file = self._write_keywords_file(sherpa_onnx, list(self.commands), tokens)
+
+        self.spotter = sherpa_onnx.KeywordSpotter(
+            tokens=tokens,
+            encoder=self._find_model_file(model_dir, "encoder"),
+            decoder=self._find_model_file(model_dir, "decoder"),
+            joiner=self._find_model_file(model_dir, "joiner"),
+            keywords_file=self._keywords_file,
+            num_threads=num_threads,
+            sample_rate=sample_rate,
+            feature_dim=80,
+            keywords_score=keywords_score,
+            keywords_threshold=keywords_threshold,
+            provider=provider,
+        )
+        self.stream = self.spotter.create_stream()
+
+    @staticmethod
+    def _find_model_file(model_dir: str, prefix: str) -> str:
+        # 优先使用 int8 量化模型
+        candidates = sorted(f for f in os.listdir(model_dir) if f.startswith(prefix) and f.endswith(".onnx"))
+        int8 = [f for f in candidates if ".int8." in f]
+        if not candidates:
+            raise FileNotFoundError(f"KWS 模型文件不存在: {model_dir}/{prefix}*.onnx")
+        return os.path.join(model_dir, (int8 or candidates)[0])
+
+    @staticmethod
+    def _write_keywords_file(sherpa_onnx, keywords: List[str], tokens: str) -> str:
+        """
+        把命令词转换为拼音 token 并写入 keywords 文件（每行："token ... @命令词"）
+        """
+        token_lists = sherpa_onnx.text2token(keywords, tokens=tokens, tokens_type="ppinyin")
+        fd, path = tempfile.mkstemp(prefix="kws_", suffix=".txt")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for keyword, token_list in zip(keywords, token_lists):
+                f.write(" ".join(token_list) + f" @{keyword}\n")
+        return path
+
+    def accept(self, samples: np.ndarray) -> List[Tuple[str, str]]:
+        """
+        输入一段音频，返回其中命中的 (命令词, 动作) 列表
+        """
+        self.stream.accept_waveform(self.sample_rate, samples)
+        hits = []
+        while self.spotter.is_ready(self.stream):
+            self.spotter.decode_stream(self.stream)
+            keyword = self.spotter.get_result(self.stream)
+            if keyword:
+                hits.append((keyword, self.commands.get(keyword, keyword)))
+                # 命中后重置，避免同一命令重复触发
+                self.spotter.reset_stream(self.stream)
+        return hits
+
+    def reset(self):
+        """
+        丢弃已输入但尚未检测的音频
+        """
+        self.stream = self.spotter.create_stream()
+
+    def __del__(self):
+        try:
+            os.remove(self._keywords_file)
+        except (AttributeError, OSError):
+            pass
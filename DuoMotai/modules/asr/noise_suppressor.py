@@ -0,0 +1,105 @@
+# modules/asr/noise_suppressor.py
+import numpy as np
+
+
+class StreamingNoiseSuppressor:
+    """
+    流式降噪（谱减 / 维纳滤波）
+    - 音频按 hop 逐块到达即处理（50% 重叠的短时傅里叶变换 + 重叠相加），只引入一个 hop 的延迟
+    - 噪声功率谱持续从 VAD 判定为非语音的帧中更新，不必每句话重新估计
+    - 增益采用判决引导（decision-directed）先验信噪比的维纳增益，并设下限避免音乐噪声
+    语句结束时降噪后的音频已经就绪，可直接送入识别器
+    输入输出均为 [-1, 1] 范围的 float32 单声道音频
+    """
+    def __init__(self, hop: int = 160, noise_alpha: float = 0.95, snr_alpha: float = 0.98,
+                 gain_floor: float = 0.1):
+        """
+        :param hop: 帧移（采样点），窗长为 2 * hop；16 kHz 下 160 即 10 ms
+        :param noise_alpha: 噪声谱平滑系数，越大噪声估计越稳定、跟踪越慢
+        :param snr_alpha: 先验信噪比的判决引导平滑系数
+        :param gain_floor: 最小增益
+        """
+        self.hop = hop
+        self.n_fft = 2 * hop
+        self.noise_alpha = noise_alpha
+        self.snr_alpha = snr_alpha
+        self.gain_floor = gain_floor
+
+        # 周期 sqrt-Hann 窗：分析和合成各乘一次，50% 重叠时可完全重建
+        self.window = np.sqrt(np.hanning(self.n_fft + 1)[:-1]).astype(np.float32)
+        self.noise_psd = None
+
+        # 预分配缓冲区
+        self._analysis = np.zeros(self.n_fft, dtype=np.float32)
+        self._overlap = np.zeros(hop, dtype=np.float32)
+        self._pending = np.zeros(hop, dtype=np.float32)
+        self._pending_len = 0
+        self._prev_snr = np.ones(hop + 1, dtype=np.float32)
+
+    def process(self, samples: np.ndarray, is_noise: bool) -> np.ndarray:
+        """
+        输入一段音频及其 VAD 判定（非语音为 True），返回降噪后的音频（整体延迟一个 hop）
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        total = len(samples)
+        out = np.empty((self._pending_len + total) // self.hop * self.hop, dtype=np.float32)
+        written = 0
+        offset = 0
+
+        if self._pending_len:
+            take = min(self.hop - self._pending_len, total)
+            self._pending[self._pending_len:self._pending_len + take] = samples[:take]
+            self._pending_len += take
+            offset = take
+            if self._pending_len < self.hop:
+                return out
+            out[:self.hop] = self._process_hop(self._pending, is_noise)
+            written = self.hop
+            self._pending_len = 0
+
+        while offset + self.hop <= total:
+            out[written:written + self.hop] = self._process_hop(samples[offset:offset + self.hop], is_noise)
+            written += self.hop
+            offset += self.hop
+
+        rest = total - offset
+        if rest:
+            self._pending[:rest] = samples[offset:]
+            self._pending_len = rest
+        return out
+
+    def _process_hop(self, block: np.ndarray, is_noise: bool) -> np.ndarray:
+        hop = self.hop
+        self._analysis[:hop] = self._analysis[hop:]
+        self._analysis[hop:] = block
+        spec = np.fft.rfft(self._analysis * self.window)
+        power = spec.real * spec.real + spec.imag * spec.imag
+
+        if is_noise:
+            if self.noise_psd is None:
+                self.noise_psd = power.astype(np.float32)
+            else:
+                self.noise_psd = self.noise_alpha * self.noise_psd + (1.0 - self.noise_alpha) * power
+
+        if self.noise_psd is not None:
+            post_snr = power / (self.noise_psd + 1e-10)
+            prio_snr = self.snr_alpha * self._prev_snr + (1.0 - self.snr_alpha) * np.maximum(post_snr - 1.0, 0.0)
+            gain = np.maximum(prio_snr / (1.0 + prio_snr), self.gain_floor)
+            self._prev_snr = (gain * gain * post_snr).astype(np.float32)
+            spec *= gain
+
+        frame = np.fft.irfft(spec, self.n_fft).astype(np.float32) * self.window
+        out = frame[:hop] + self._overlap
+        self._overlap[:] = frame[hop:]
+        return out
+
+    def reset(self, keep_noise_profile: bool = True):
+        """
+        清空流式状态；默认保留已学习的噪声谱
+        """
+        self._analysis[:] = 0
+        self._overlap[:] = 0
+        self._pending_len = 0
+        self._prev_snr[:] = 1
+        if not keep_noise_profile:
+            self.noise_psd = None
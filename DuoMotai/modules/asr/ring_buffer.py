@@ -0,0 +1,93 @@
+# modules/asr/ring_buffer.py
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    固定容量的 float32 音频环形缓冲区（单写单读）
+    - 录音回调直接把音频块写入预分配的数组，不再经过 queue.Queue 复制
+    - 读取端通过 views() 拿到零拷贝视图（环绕时为两段），处理完后调用 consume() 释放
+    - 缓冲区写满时丢弃新数据并计数，保证读取端持有的视图不会被覆盖
+    长时间运行时内存恒定，每个音频块只复制一次
+    """
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self._read = 0      # 累计读取位置
+        self._write = 0     # 累计写入位置
+        self._cond = threading.Condition()
+        self.overruns = 0   # 因缓冲区满被丢弃的样本数
+
+    def __len__(self) -> int:
+        return self._write - self._read
+
+    @property
+    def read_position(self) -> int:
+        """
+        累计已读取的样本数（可用于在数据流中标记位置）
+        """
+        return self._read
+
+    @property
+    def write_position(self) -> int:
+        """
+        累计已写入的样本数
+        """
+        return self._write
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        写入音频（在录音回调中调用），返回实际写入的样本数
+        """
+        with self._cond:
+            free = self.capacity - (self._write - self._read)
+            n = min(len(samples), free)
+            if n < len(samples):
+                self.overruns += len(samples) - n
+            start = self._write % self.capacity
+            first = min(n, self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            if n > first:
+                self._data[:n - first] = samples[first:n]
+            self._write += n
+            self._cond.notify()
+        return n
+
+    def wait(self, min_samples: int = 1, timeout: Optional[float] = None) -> int:
+        """
+        阻塞等待至少 min_samples 个样本可读，返回当前可读样本数
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._write - self._read >= min_samples, timeout)
+            return self._write - self._read
+
+    def views(self, max_samples: Optional[int] = None) -> List[np.ndarray]:
+        """
+        返回可读数据的零拷贝视图（最多两段），在 consume() 之前有效
+        """
+        with self._cond:
+            available = self._write - self._read
+        n = available if max_samples is None else min(available, max_samples)
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        segments = [self._data[start:start + first]]
+        if n > first:
+            segments.append(self._data[:n - first])
+        return segments
+
+    def consume(self, n: int):
+        """
+        标记 n 个样本已处理，释放其空间供写入
+        """
+        with self._cond:
+            self._read += min(n, self._write - self._read)
+
+    def clear(self):
+        """
+        丢弃所有未读数据
+        """
+        with self._cond:
+            self._read = self._write
@@ -0,0 +1,209 @@
+# modules/asr/vad_segmenter.py
+from collections import deque
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class VADSegmenter:
+    """
+    基于语音活动检测（VAD）的语句切分器
+    - 优先使用 webrtcvad，未安装时回退到自适应能量阈值 VAD
+    - 逐帧处理任意长度的音频块，检测到尾部静音（hangover）后立即输出整句
+    - 静音不会进入识别器；超过最大时长的语句会被强制切分
+    - 按累计输入的采样点计位置，process_with_ranges() 同时返回每句在输入流中的 [起点, 终点)
+    输入输出均为 [-1, 1] 范围的 float32 单声道音频
+    """
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 20, aggressiveness: int = 2,
+                 hangover_ms: int = 500, min_speech_ms: int = 250, max_utterance_s: float = 8.0,
+                 pre_roll_ms: int = 200, energy_threshold: float = 0.005):
+        """
+        :param sample_rate: 采样率（webrtcvad 支持 8k/16k/32k/48k）
+        :param frame_ms: 帧长（webrtcvad 支持 10/20/30 ms）
+        :param aggressiveness: webrtcvad 灵敏度 0~3，越大越严格
+        :param hangover_ms: 语音结束后持续多长静音才认为一句话结束
+        :param min_speech_ms: 少于该时长的语音视为噪声丢弃
+        :param max_utterance_s: 单句最大时长，超过则强制切分
+        :param pre_roll_ms: 语音开始前保留的音频，避免吞掉首字
+        :param energy_threshold: 能量 VAD 的最小 RMS 阈值
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.energy_threshold = energy_threshold
+
+        try:
+            import webrtcvad
+            self.vad = webrtcvad.Vad(aggressiveness)
+        except ImportError:
+            self.vad = None
+        self.noise_floor = energy_threshold
+
+        # 预分配缓冲区，避免每帧拼接数组
+        self._pending = np.zeros(self.frame_size, dtype=np.float32)
+        self._pending_len = 0
+        self._utterance = np.zeros(int(max_utterance_s * sample_rate), dtype=np.float32)
+        self._utterance_len = 0
+        self._pre_roll = deque(maxlen=max(0, pre_roll_ms // frame_ms))
+
+        self.in_speech = False
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._discard = False
+        self.position = 0              # 累计输入的采样点数（reset() 不清零）
+        self._utterance_start = 0
+
+    # ============================================================
+    # 单帧判断
+    # ============================================================
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """
+        判断一帧音频是否为语音
+        """
+        if self.vad is not None:
+            pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16)
+            return self.vad.is_speech(pcm.tobytes(), self.sample_rate)
+
+        # 能量 VAD：阈值随非语音帧的能量自适应
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        speech = rms > max(self.energy_threshold, self.noise_floor * 3.0)
+        if not speech:
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+    # ============================================================
+    # 流式处理
+    # ============================================================
+    def process(self, samples: np.ndarray) -> List[np.ndarray]:
+        """
+        输入一段音频，返回其中已经结束的语句列表
+        """
+        return [utterance for utterance, _, _ in self.process_with_ranges(samples)]
+
+    def process_with_ranges(self, samples: np.ndarray) -> List[Tuple[np.ndarray, int, int]]:
+        """
+        同 process()，返回 (语句, 起点, 终点)，起止为累计采样点位置（含预留的前导音频和尾部静音）
+        一段输入中切出多句时，各句的区间互不重叠
+        """
+        utterances = []
+        offset = 0
+        total = len(samples)
+        base = self.position
+        self.position += total
+
+        # 先补齐上次遗留的不完整帧
+        if self._pending_len:
+            need = self.frame_size - self._pending_len
+            take = min(need, total)
+            self._pending[self._pending_len:self._pending_len + take] = samples[:take]
+            self._pending_len += take
+            offset = take
+            if self._pending_len < self.frame_size:
+                return utterances
+            self._process_frame(self._pending, base + offset - self.frame_size, utterances)
+            self._pending_len = 0
+
+        while offset + self.frame_size <= total:
+            self._process_frame(samples[offset:offset + self.frame_size], base + offset, utterances)
+            offset += self.frame_size
+
+        rest = total - offset
+        if rest:
+            self._pending[:rest] = samples[offset:]
+            self._pending_len = rest
+        return utterances
+
+    def _process_frame(self, frame: np.ndarray, start: int, utterances: list):
+        speech = self.is_speech(frame)
+        end = start + self.frame_size
+
+        if not self.in_speech:
+            if speech:
+                self.in_speech = True
+                self._speech_frames = 1
+                self._silence_frames = 0
+                self._utterance_len = 0
+                self._utterance_start = start - len(self._pre_roll) * self.frame_size
+                for pre in self._pre_roll:
+                    self._append(pre)
+                self._pre_roll.clear()
+                self._append(frame)
+            elif self._pre_roll.maxlen:
+                self._pre_roll.append(frame.copy())
+            return
+
+        self._append(frame)
+        if speech:
+            self._speech_frames += 1
+            self._silence_frames = 0
+        else:
+            self._silence_frames += 1
+
+        if self._silence_frames >= self.hangover_frames:
+            utterance_start = self._utterance_start
+            utterance = self._finish()
+            if utterance is not None:
+                utterances.append((utterance, utterance_start, end))
+        elif self._utterance_len + self.frame_size > len(self._utterance):
+            # 超过最大时长，强制切分后继续录制下一段
+            utterance_start = self._utterance_start
+            utterance = self._finish()
+            if utterance is not None:
+                utterances.append((utterance, utterance_start, end))
+            self.in_speech = True
+            self._utterance_start = end
+
+    def _append(self, frame: np.ndarray):
+        n = min(len(frame), len(self._utterance) - self._utterance_len)
+        self._utterance[self._utterance_len:self._utterance_len + n] = frame[:n]
+        self._utterance_len += n
+
+    def _finish(self) -> Optional[np.ndarray]:
+        """
+        结束当前语句；语音帧过少时视为噪声丢弃
+        """
+        utterance = None
+        if self._speech_frames >= self.min_speech_frames and not self._discard:
+            utterance = self._utterance[:self._utterance_len].copy()
+        self._discard = False
+        self.in_speech = False
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._utterance_len = 0
+        return utterance
+
+    def discard_current(self):
+        """
+        丢弃正在进行的语句（例如已被关键词检测识别为命令），结束后不再输出
+        """
+        if self.in_speech:
+            self._discard = True
+
+    def current(self) -> Optional[np.ndarray]:
+        """
+        返回正在进行的语句的副本（用于输出中间结果），不在语音中时返回 None
+        """
+        if not self.in_speech:
+            return None
+        return self._utterance[:self._utterance_len].copy()
+
+    def flush(self) -> Optional[np.ndarray]:
+        """
+        立即结束当前语句（例如停止录音时）
+        """
+        if not self.in_speech:
+            return None
+        return self._finish()
+
+    def reset(self):
+        """
+        丢弃所有未完成的音频
+        """
+        self._pending_len = 0
+        self._pre_roll.clear()
+        self.in_speech = False
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._utterance_len = 0
+        self._discard = False
@@ -47,6 +47,11 @@ class ProductManager:
 
         print(f"[ProductManager] ✅ Loaded {len(self.products)} products.")
 
+    def reload(self):
+        """重新加载商品规格；加载完成后整体替换，检索不会看到加载一半的目录"""
+        fresh = ProductManager(self.image_dir, self.spec_dir)
+        self.products = fresh.products
+
     def search_by_keyword(self, keyword: str) -> List[Dict[str, Any]]:
         """根据关键字搜索商品"""
         keyword = keyword.lower()
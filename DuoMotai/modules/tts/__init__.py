@@ -1,9 +1,13 @@
 # modules/tts/__init__.py
 from .tts_service import TTSService
+from .tts_cache import TTSCache
+from .audio_buffer import AudioBuffer
 from .tts_utils import save_audio, list_voices
 
 __all__ = [
     "TTSService",
+    "TTSCache",
+    "AudioBuffer",
     "save_audio",
     "list_voices",
 ]
@@ -0,0 +1,112 @@
+# modules/tts/audio_buffer.py
+import io
+import wave
+from typing import Optional
+
+import numpy as np
+
+# Opus 只支持这些采样率
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class AudioBuffer:
+    """
+    内存中的单声道音频，以 int16 PCM 保存（占用为 float32 的一半）
+    - 切片共享底层内存（零拷贝），播放时分块读取、拼接前裁剪都不复制数据
+    - 冷数据可压缩为 Opus（需要 soundfile，且 libsndfile 支持 OGG/Opus）
+    """
+    __slots__ = ("pcm", "sample_rate")
+
+    def __init__(self, pcm: np.ndarray, sample_rate: int):
+        if pcm.dtype != np.int16:
+            raise TypeError(f"AudioBuffer 只接受 int16 PCM，收到 {pcm.dtype}，浮点数据请使用 from_float()")
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+
+    # ============================================================
+    # 构造
+    # ============================================================
+    @classmethod
+    def from_float(cls, samples: np.ndarray, sample_rate: int) -> "AudioBuffer":
+        return cls((np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16), sample_rate)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "AudioBuffer":
+        """
+        解码内存中的音频文件（引擎返回的 WAV 字节、Opus 压缩数据等）
+        16-bit PCM WAV 直接引用原始数据；其他格式需要 soundfile
+        """
+        try:
+            with wave.open(io.BytesIO(data), "rb") as f:
+                width = f.getsampwidth()
+                channels = f.getnchannels()
+                sample_rate = f.getframerate()
+                raw = f.readframes(f.getnframes())
+            if width == 2:
+                return cls(np.frombuffer(raw, dtype=np.int16)[::channels], sample_rate)
+        except (wave.Error, EOFError):
+            pass
+
+        import soundfile as sf
+        samples, sample_rate = sf.read(io.BytesIO(data), dtype="int16", always_2d=True)
+        return cls(np.ascontiguousarray(samples[:, 0]), sample_rate)
+
+    @classmethod
+    def from_file(cls, path: str) -> "AudioBuffer":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    # ============================================================
+    # 访问
+    # ============================================================
+    def __len__(self) -> int:
+        return len(self.pcm)
+
+    def __getitem__(self, index: slice) -> "AudioBuffer":
+        """
+        按采样点切片，返回共享内存的视图
+        """
+        if not isinstance(index, slice):
+            raise TypeError("AudioBuffer 只支持切片")
+        return AudioBuffer(self.pcm[index], self.sample_rate)
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return self.pcm.nbytes
+
+    def to_float(self) -> np.ndarray:
+        return self.pcm.astype(np.float32) / 32768.0
+
+    # ============================================================
+    # 导出与压缩
+    # ============================================================
+    def to_wav_bytes(self) -> bytes:
+        out = io.BytesIO()
+        with wave.open(out, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(self.pcm.tobytes())
+        return out.getvalue()
+
+    def write_wav(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_wav_bytes())
+
+    def compress(self) -> Optional[bytes]:
+        """
+        压缩为 Opus（OGG 封装），用 from_bytes() 解码；不支持时返回 None
+        """
+        if self.sample_rate not in OPUS_SAMPLE_RATES or len(self.pcm) == 0:
+            return None
+        try:
+            import soundfile as sf
+            out = io.BytesIO()
+            sf.write(out, self.pcm, self.sample_rate, format="OGG", subtype="OPUS")
+            return out.getvalue()
+        except Exception:
+            return None
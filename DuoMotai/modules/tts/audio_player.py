@@ -0,0 +1,122 @@
+# modules/tts/audio_player.py
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from .audio_buffer import AudioBuffer
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """
+    线性插值重采样（语音播放足够）
+    """
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    n = int(round(len(samples) * dst_rate / src_rate))
+    positions = np.arange(n, dtype=np.float64) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+class AudioPlayer:
+    """
+    进程内音频播放（sounddevice）
+    - 常驻一个输出流，空闲时输出静音，每次播报无需重新打开设备、也不启动外部播放器进程
+    - 直接播放内存中的 AudioBuffer（int16，回调中按块转换），采样率与输出流不同时先重采样
+    - stop() 后音频回调立即改为输出静音，停止位置精确到采样点
+    """
+    def __init__(self, sample_rate: Optional[int] = None, blocksize: int = 256, device=None):
+        """
+        :param sample_rate: 输出流采样率，None 表示使用第一段音频的采样率
+        :param blocksize: 回调块大小（采样点），越小停止越及时
+        :param device: sounddevice 输出设备，None 为系统默认
+        """
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.device = device
+        self._stream = None
+        self._failed = False
+        self._lock = threading.Lock()
+        self._buffer = None
+        self._pos = 0
+        self._finished = threading.Event()
+
+    # ============================================================
+    # 输出流
+    # ============================================================
+    def _open(self, sample_rate: int):
+        if self._stream is not None:
+            return
+        if self._failed:
+            raise RuntimeError("音频输出设备不可用")
+        try:
+            import sounddevice as sd
+            self.sample_rate = self.sample_rate or sample_rate
+            self._stream = sd.OutputStream(samplerate=self.sample_rate, channels=1, dtype="float32",
+                                           blocksize=self.blocksize, device=self.device,
+                                           callback=self._callback)
+            self._stream.start()
+            print(f"[TTS] 🔊 音频输出流已打开（{self.sample_rate} Hz）")
+        except Exception:
+            self._failed = True
+            self._stream = None
+            raise
+
+    def _callback(self, outdata, frames, time_info, status):
+        with self._lock:
+            buffer = self._buffer
+            if buffer is None:
+                outdata.fill(0)
+                return
+            n = min(frames, len(buffer) - self._pos)
+            outdata[:n, 0] = buffer[self._pos:self._pos + n] * (1.0 / 32768.0)
+            outdata[n:] = 0
+            self._pos += n
+            if self._pos >= len(buffer):
+                self._buffer = None
+                self._finished.set()
+
+    # ============================================================
+    # 播放控制
+    # ============================================================
+    def play(self, audio: AudioBuffer, cancel: Optional[threading.Event] = None) -> bool:
+        """
+        播放一段音频（阻塞到播放结束或被取消），正常播完返回 True
+        """
+        self._open(audio.sample_rate)
+        if audio.sample_rate != self.sample_rate:
+            audio = AudioBuffer.from_float(resample(audio.to_float(), audio.sample_rate, self.sample_rate),
+                                           self.sample_rate)
+        with self._lock:
+            self._buffer = audio.pcm
+            self._pos = 0
+            self._finished.clear()
+
+        while not self._finished.wait(0.02):
+            if cancel is not None and cancel.is_set():
+                self.stop()
+                return False
+        if cancel is not None and cancel.is_set():
+            return False
+        # 等待设备缓冲中的最后一块播完
+        time.sleep(self._stream.latency if self._stream is not None else 0)
+        return True
+
+    def stop(self):
+        """
+        立即停止当前播放
+        """
+        with self._lock:
+            self._buffer = None
+            self._finished.set()
+
+    def close(self):
+        self.stop()
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
@@ -0,0 +1,323 @@
+# modules/tts/tts_cache.py
+import hashlib
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .audio_buffer import AudioBuffer
+
+# AudioBuffer.to_wav_bytes() 写出的 PCM WAV 头大小，后台写盘前按它估算文件大小
+WAV_HEADER_BYTES = 44
+
+class TTSCache:
+    """
+    按内容寻址的语音缓存
+    - 键为 (文本, 引擎, 音色, 语速) 的哈希，同一句话只合成一次
+    - 音频以 <键>.wav 存放在缓存目录中，进程重启后仍然有效
+    - 按最近使用顺序（LRU）淘汰：总大小超过上限，或超过 max_age 秒未被使用的条目会被删除
+    - 内存层：最近使用的音频以 AudioBuffer 常驻内存，命中时不读磁盘；
+      超出 memory_max_bytes 的较冷条目压缩为 Opus 保留在内存中（不支持压缩时只留在磁盘上）
+    - 新合成的音频先进入内存层，由后台线程写入磁盘，播放不等待写文件
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024, max_age: float = 7 * 24 * 3600,
+                 memory_max_bytes: int = 16 * 1024 * 1024, cold_max_bytes: int = 8 * 1024 * 1024):
+        """
+        :param cache_dir: 缓存目录
+        :param max_bytes: 缓存总大小上限（字节）
+        :param max_age: 条目最长未使用时间（秒）
+        :param memory_max_bytes: 内存中未压缩音频的大小上限（字节）
+        :param cold_max_bytes: 内存中 Opus 压缩音频的大小上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.memory_max_bytes = memory_max_bytes
+        self.cold_max_bytes = cold_max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (大小, 最近使用时间)，按最近使用排序
+        self._total_bytes = 0
+        self._hot = OrderedDict()      # key -> AudioBuffer，按最近使用排序
+        self._hot_bytes = 0
+        self._cold = OrderedDict()     # key -> Opus 压缩数据
+        self._cold_bytes = 0
+        self._unwritten = {}           # key -> 尚未写入磁盘的 AudioBuffer
+        self._writes = queue.Queue()
+        self._writer = None
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    @staticmethod
+    def make_key(text: str, engine: str, voice: Optional[str], rate: int) -> str:
+        raw = "\x1f".join([text.strip(), str(engine), str(voice or ""), str(rate)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def temp_path(self, key: str) -> str:
+        """
+        写盘时使用的临时文件路径（每个线程独立，写完后由后台写盘线程原子替换为正式文件）
+        """
+        return os.path.join(self.cache_dir, f".{key}.{threading.get_ident()}.tmp.wav")
+
+    def _scan(self):
+        """
+        启动时扫描已有缓存文件（文件修改时间即最近使用时间）
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith("."):
+                # 上次异常退出残留的临时文件
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(".wav"):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, name[:-4], st.st_size))
+        for mtime, key, size in sorted(entries):
+            self._entries[key] = (size, mtime)
+            self._total_bytes += size
+        with self._lock:
+            self._evict()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        查询缓存，命中时返回音频路径并刷新其最近使用时间
+        """
+        if key in self._unwritten:
+            self.flush()
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is None or now - entry[1] > self.max_age:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            path = self.path_for(key)
+            if not os.path.exists(path):
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries[key] = (entry[0], now)
+            self._entries.move_to_end(key)
+            self.hits += 1
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return path
+
+    def get_audio(self, key: str) -> Optional[AudioBuffer]:
+        """
+        查询缓存并返回音频：优先内存层，其次解压冷条目，最后读磁盘；读到的音频放回内存层
+        """
+        audio = None
+        compressed = None
+        with self._lock:
+            if self._touch(key):
+                audio = self._hot.get(key)
+                if audio is not None:
+                    self._hot.move_to_end(key)
+                    self.hits += 1
+                elif key in self._unwritten:
+                    # 已被挤出内存层但还没写完，直接用待写入的音频
+                    audio = self._unwritten[key]
+                    self.hits += 1
+                else:
+                    compressed = self._cold.pop(key, None)
+                    if compressed is not None:
+                        self._cold_bytes -= len(compressed)
+                        self.hits += 1
+
+        if audio is not None or compressed is not None:
+            # 内存层命中只刷新文件时间（重启后按它恢复 LRU 顺序），不读文件
+            self._utime(key)
+            if audio is not None:
+                return audio
+            audio = AudioBuffer.from_bytes(compressed)
+        else:
+            path = self.get(key)
+            if path is None:
+                return None
+            try:
+                audio = AudioBuffer.from_file(path)
+            except Exception:
+                return None
+        with self._lock:
+            self._remember(key, audio)
+        return audio
+
+    def _touch(self, key: str) -> bool:
+        """
+        内存层命中时刷新最近使用时间，条目已过期或已被淘汰时返回 False（调用方需持有锁）
+        """
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry is None or now - entry[1] > self.max_age:
+            return False
+        self._entries[key] = (entry[0], now)
+        self._entries.move_to_end(key)
+        return True
+
+    def _utime(self, key: str):
+        try:
+            os.utime(self.path_for(key))
+        except OSError:
+            pass
+
+    def contains(self, key: str) -> bool:
+        """
+        是否已缓存（不刷新使用时间、不计入命中统计，供预合成使用）
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.time() - entry[1] <= self.max_age
+
+    def put_audio(self, key: str, audio: AudioBuffer) -> Optional[str]:
+        """
+        缓存合成好的音频：立即放入内存层并返回，WAV 文件由后台线程写入（供重启后使用）
+        返回缓存路径；需要读取文件的调用方应使用 file_for()，它会等待写入完成
+        """
+        if len(audio) == 0:
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries[key][0]
+            self._entries[key] = (audio.nbytes + WAV_HEADER_BYTES, time.time())
+            self._entries.move_to_end(key)
+            self._total_bytes += audio.nbytes + WAV_HEADER_BYTES
+            self._unwritten[key] = audio
+            self._remember(key, audio)
+            self._evict(keep=key)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+        self._writes.put(key)
+        return self.path_for(key)
+
+    def _write_loop(self):
+        """
+        后台写盘线程：写临时文件后原子替换；写入前条目已被替换或淘汰的跳过
+        """
+        while True:
+            key = self._writes.get()
+            try:
+                with self._lock:
+                    audio = self._unwritten.get(key)
+                if audio is None:
+                    continue
+                temp_path = self.temp_path(key)
+                try:
+                    audio.write_wav(temp_path)
+                except OSError:
+                    with self._lock:
+                        if self._unwritten.get(key) is audio:
+                            del self._unwritten[key]
+                    self._discard(temp_path)
+                    continue
+                with self._lock:
+                    current = self._unwritten.get(key) is audio
+                    if current:
+                        os.replace(temp_path, self.path_for(key))
+                        del self._unwritten[key]
+                if not current:
+                    self._discard(temp_path)
+            finally:
+                self._writes.task_done()
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def flush(self):
+        """
+        等待所有待写入的音频落盘（退出前或需要文件路径时调用）
+        """
+        if self._writer is not None:
+            self._writes.join()
+
+    def file_for(self, key: str) -> Optional[str]:
+        """
+        返回已缓存音频的文件路径（等待后台写入完成），未缓存时返回 None
+        """
+        if key in self._unwritten:
+            self.flush()
+        path = self.path_for(key)
+        return path if os.path.exists(path) else None
+
+    def _remember(self, key: str, audio: AudioBuffer):
+        """
+        放入内存层；超出上限时把最久未用的条目压缩为冷条目（调用方需持有锁）
+        """
+        self._forget(key)
+        self._hot[key] = audio
+        self._hot_bytes += audio.nbytes
+        while self._hot_bytes > self.memory_max_bytes and len(self._hot) > 1:
+            cold_key, cold_audio = self._hot.popitem(last=False)
+            self._hot_bytes -= cold_audio.nbytes
+            compressed = cold_audio.compress() if self.cold_max_bytes > 0 else None
+            if compressed is None:
+                continue
+            self._cold[cold_key] = compressed
+            self._cold_bytes += len(compressed)
+        while self._cold_bytes > self.cold_max_bytes and self._cold:
+            _, compressed = self._cold.popitem(last=False)
+            self._cold_bytes -= len(compressed)
+
+    def _forget(self, key: str):
+        """
+        从内存层移除（调用方需持有锁）
+        """
+        audio = self._hot.pop(key, None)
+        if audio is not None:
+            self._hot_bytes -= audio.nbytes
+        compressed = self._cold.pop(key, None)
+        if compressed is not None:
+            self._cold_bytes -= len(compressed)
+
+    def _remove(self, key: str):
+        size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+        self._forget(key)
+        self._unwritten.pop(key, None)
+        try:
+            os.remove(self.path_for(key))
+        except OSError:
+            pass
+
+    def _evict(self, keep: Optional[str] = None):
+        """
+        淘汰过期条目，再按 LRU 顺序淘汰直到总大小不超过上限（调用方需持有锁）
+        """
+        now = time.time()
+        for key in [k for k, (_, last) in self._entries.items() if now - last > self.max_age]:
+            self._remove(key)
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep:
+                break
+            self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._total_bytes,
+                    "memory_entries": len(self._hot), "memory_bytes": self._hot_bytes,
+                    "cold_entries": len(self._cold), "cold_bytes": self._cold_bytes,
+                    "unwritten_entries": len(self._unwritten),
+                    "hits": self.hits, "misses": self.misses}
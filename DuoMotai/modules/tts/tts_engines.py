@@ -0,0 +1,366 @@
+# modules/tts/tts_engines.py
+import contextlib
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from .audio_buffer import AudioBuffer
+
+BENCHMARK_TEXT = "亲亲你想买什么"
+
+
+class TTSEngine:
+    """
+    TTS 引擎基类：probe() 检测是否可用，synthesize() 失败时抛出异常
+    synthesize_audio() 返回内存中的 AudioBuffer；默认经临时文件中转，能直接输出音频数据的引擎应覆盖它
+    """
+    name = "base"
+    benchmark = True       # 是否参与启动基准测试（在线引擎不参与）
+    thread_safe = False    # 能否被多个线程同时调用，否则由注册表串行调用
+
+    def probe(self) -> bool:
+        raise NotImplementedError
+
+    def synthesize(self, text: str, output_path: str):
+        raise NotImplementedError
+
+    def synthesize_audio(self, text: str) -> AudioBuffer:
+        fd, output_path = tempfile.mkstemp(prefix=f"tts_{self.name}_", suffix=".wav")
+        os.close(fd)
+        try:
+            self.synthesize(text, output_path)
+            return AudioBuffer.from_file(output_path)
+        finally:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+
+class IndexTTSEngine(TTSEngine):
+    """
+    本地 IndexTTS（ModelScope pipeline），模型由 TTSService 加载
+    """
+    name = "indextts"
+
+    def __init__(self, get_pipeline: Callable):
+        self.get_pipeline = get_pipeline
+
+    def probe(self) -> bool:
+        return self.get_pipeline() is not None
+
+    def synthesize(self, text: str, output_path: str):
+        result = self.get_pipeline()(input=text)
+        with open(output_path, "wb") as f:
+            f.write(result["output_wav"])
+
+    def synthesize_audio(self, text: str) -> AudioBuffer:
+        # 模型直接返回 WAV 字节，在内存中解码，不经过磁盘
+        return AudioBuffer.from_bytes(self.get_pipeline()(input=text)["output_wav"])
+
+
+class ESpeakEngine(TTSEngine):
+    name = "espeak"
+    thread_safe = True
+
+    def probe(self) -> bool:
+        return shutil.which("espeak") is not None
+
+    def synthesize(self, text: str, output_path: str):
+        cmd = ["espeak", "-v", "zh", "-s", "150", "-w", output_path, text]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class FestivalEngine(TTSEngine):
+    name = "festival"
+    thread_safe = True
+
+    def probe(self) -> bool:
+        return shutil.which("text2wave") is not None
+
+    def synthesize(self, text: str, output_path: str):
+        # 文本通过标准输入传入，不经过 shell
+        subprocess.run(["text2wave", "-o", output_path], input=text.encode("utf-8"), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class Pyttsx3Engine(TTSEngine):
+    name = "pyttsx3"
+
+    def __init__(self, voice: Optional[str] = None, rate: int = 180):
+        self.voice = voice
+        self.rate = rate
+        self._engine = None
+
+    def probe(self) -> bool:
+        # 只检查模块是否存在；pyttsx3.init() 会加载系统语音驱动，推迟到首次合成
+        return importlib.util.find_spec("pyttsx3") is not None
+
+    def _get_engine(self):
+        if self._engine is None:
+            import pyttsx3
+            engine = pyttsx3.init()
+            engine.setProperty("rate", self.rate)
+            if self.voice:
+                engine.setProperty("voice", self.voice)
+            self._engine = engine
+        return self._engine
+
+    def synthesize(self, text: str, output_path: str):
+        # 非线程安全，注册表串行调用，首次创建引擎也在同一把锁内
+        engine = self._get_engine()
+        engine.save_to_file(text, output_path)
+        engine.runAndWait()
+
+
+class GTTSEngine(TTSEngine):
+    """
+    Google TTS（在线），只作为最后的回退，不参与基准测试
+    """
+    name = "gtts"
+    benchmark = False
+    thread_safe = True
+
+    def probe(self) -> bool:
+        return importlib.util.find_spec("gtts") is not None
+
+    def synthesize(self, text: str, output_path: str):
+        from gtts import gTTS
+        gTTS(text=text, lang="zh-CN", slow=False, lang_check=False).save(output_path)
+
+
+class EngineRegistry:
+    """
+    TTS 引擎注册表
+    - 首次使用时才检测各引擎是否可用（导入模块时不再启动子进程），结果缓存到文件，重启后直接复用
+    - 对可用引擎各合成一句短文本，按实时率（合成耗时 / 音频时长）从快到慢排序，回退顺序与排序一致
+    - 熔断：连续失败 failure_threshold 次的引擎暂停使用 cooldown 秒，之后再试一次
+    - 非线程安全的引擎（本地模型、pyttsx3）各自加锁串行调用，子进程类引擎可并发合成
+    """
+    def __init__(self, engines: List[TTSEngine], preferred: Optional[str] = None,
+                 state_file: Optional[str] = None, state_ttl: float = 24 * 3600,
+                 failure_threshold: int = 3, cooldown: float = 300.0):
+        """
+        :param engines: 候选引擎
+        :param preferred: 指定优先使用的引擎名（例如 "indextts"），None 表示完全按实时率排序
+        :param state_file: 可用性和实时率的缓存文件
+        :param state_ttl: 缓存有效期（秒）
+        """
+        self.engines = {engine.name: engine for engine in engines}
+        self.preferred = preferred
+        self.state_file = state_file
+        self.state_ttl = state_ttl
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.rtf = {}              # 引擎名 -> 实时率，None 表示不可用
+        self._ranking = None
+        self._benchmarking = False # 是否有线程正在检测和测速
+        self._generation = 0       # invalidate() 次数，用于作废进行中的测速结果
+        self._failures = {}        # 引擎名 -> 连续失败次数
+        self._open_until = {}      # 引擎名 -> 熔断结束时间
+        self._lock = threading.Lock()
+        self._breaker_lock = threading.Lock()  # 保护 _failures / _open_until，多个线程会同时合成
+        self._engine_locks = {engine.name: threading.Lock() for engine in engines if not engine.thread_safe}
+
+    # ============================================================
+    # 检测与排序
+    # ============================================================
+    def ranking(self) -> List[str]:
+        """
+        返回引擎使用顺序
+        首次调用的线程负责检测和测速，测速期间不持锁：其他线程（实时请求）不等待，
+        按静态顺序（指定引擎优先，其余按注册顺序）使用可用的引擎，测速完成后再切换到实测排序
+        """
+        with self._lock:
+            if self._ranking is not None:
+                return list(self._ranking)
+            benchmarking = self._benchmarking
+            self._benchmarking = True
+            generation = self._generation
+        if benchmarking:
+            return self._static_ranking()
+
+        rtf = None
+        measured = False
+        try:
+            rtf = self._load_state()
+            if rtf is None:
+                rtf = self._benchmark()
+                measured = True
+        finally:
+            with self._lock:
+                self._benchmarking = False
+                # 测速期间调用过 invalidate() 的结果作废，下次使用时重新测速
+                if rtf is not None and generation == self._generation:
+                    if measured:
+                        self._save_state(rtf)
+                    self.rtf = rtf
+                    self._ranking = self._rank(rtf)
+                    print(f"[TTS] 🏁 引擎顺序: {self._format_ranking()}")
+                ranking = None if self._ranking is None else list(self._ranking)
+        return ranking if ranking is not None else self._static_ranking()
+
+    def _static_ranking(self) -> List[str]:
+        """
+        测速完成前使用的顺序：只做轻量探测，不合成
+        """
+        available = []
+        for name, engine in self.engines.items():
+            try:
+                if engine.probe():
+                    available.append(name)
+            except Exception:
+                pass
+        if self.preferred in available:
+            available.remove(self.preferred)
+            available.insert(0, self.preferred)
+        return available
+
+    def _benchmark(self) -> dict:
+        rtf = {}
+        for name, engine in self.engines.items():
+            try:
+                available = engine.probe()
+            except Exception:
+                available = False
+            if not available:
+                rtf[name] = None
+                continue
+            if not engine.benchmark:
+                rtf[name] = float("inf")
+                continue
+            rtf[name] = self._measure(engine)
+        return rtf
+
+    def _measure(self, engine: TTSEngine) -> Optional[float]:
+        """
+        合成一句短文本并计算实时率，失败返回 None
+        测速与实时请求可能同时使用同一引擎，同样按引擎加锁
+        """
+        try:
+            with self._guard(engine.name):
+                start = time.perf_counter()
+                audio = engine.synthesize_audio(BENCHMARK_TEXT)
+                elapsed = time.perf_counter() - start
+            return elapsed / audio.duration if audio.duration > 0 else None
+        except Exception as e:
+            print(f"[TTS] ⚠️ 引擎 {engine.name} 测速失败: {e}")
+            return None
+
+    def _rank(self, rtf: dict) -> List[str]:
+        available = [name for name, value in rtf.items() if value is not None and name in self.engines]
+        available.sort(key=lambda name: rtf[name])
+        if self.preferred in available:
+            available.remove(self.preferred)
+            available.insert(0, self.preferred)
+        return available
+
+    def _format_ranking(self) -> str:
+        parts = []
+        for name in self._ranking:
+            rtf = self.rtf[name]
+            parts.append(name if rtf == float("inf") else f"{name}(RTF {rtf:.2f})")
+        return " > ".join(parts) or "无可用引擎"
+
+    def _load_state(self) -> Optional[dict]:
+        """
+        读取缓存的检测结果，过期或与当前可用性不一致时返回 None
+        """
+        if not self.state_file or not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if time.time() - state["time"] > self.state_ttl or set(state["rtf"]) != set(self.engines):
+                return None
+            rtf = {name: (float("inf") if value == "inf" else value) for name, value in state["rtf"].items()}
+            # 探测本身很轻（which / find_spec / 模型是否已加载），可用性与缓存不一致时重新测速
+            for name, value in rtf.items():
+                try:
+                    available = self.engines[name].probe()
+                except Exception:
+                    available = False
+                if available != (value is not None):
+                    return None
+            return rtf
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save_state(self, rtf: dict):
+        if not self.state_file:
+            return
+        try:
+            state = {"time": time.time(),
+                     "rtf": {name: ("inf" if value == float("inf") else value) for name, value in rtf.items()}}
+            with open(self.state_file, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+        except OSError:
+            pass
+
+    def invalidate(self):
+        """
+        丢弃检测结果，下次使用时重新检测和测速（例如模型重新加载后）
+        """
+        with self._lock:
+            self._generation += 1
+            self._ranking = None
+            self.rtf = {}
+            if self.state_file and os.path.exists(self.state_file):
+                os.remove(self.state_file)
+
+    # ============================================================
+    # 合成与熔断
+    # ============================================================
+    def _guard(self, name: str):
+        lock = self._engine_locks.get(name)
+        return lock if lock is not None else contextlib.nullcontext()
+
+    def primary(self) -> Optional[str]:
+        """
+        排序第一的引擎（未熔断时由它合成），没有可用引擎时返回 None
+        """
+        ranking = self.ranking()
+        return ranking[0] if ranking else None
+
+    def synthesize(self, text: str) -> Tuple[Optional[AudioBuffer], Optional[str]]:
+        """
+        按排序依次尝试各引擎，返回 (音频, 实际合成的引擎名)；全部失败返回 (None, None)
+        """
+        for name in self.ranking():
+            if self._is_open(name):
+                continue
+            try:
+                with self._guard(name):
+                    audio = self.engines[name].synthesize_audio(text)
+                if len(audio) == 0:
+                    raise RuntimeError("未生成音频")
+                with self._breaker_lock:
+                    self._failures[name] = 0
+                return audio, name
+            except Exception as e:
+                self._record_failure(name, e)
+        return None, None
+
+    def _is_open(self, name: str) -> bool:
+        with self._breaker_lock:
+            return time.time() < self._open_until.get(name, 0)
+
+    def _record_failure(self, name: str, error: Exception):
+        with self._breaker_lock:
+            failures = self._failures.get(name, 0) + 1
+            self._failures[name] = failures
+            tripped = failures >= self.failure_threshold
+            if tripped:
+                self._open_until[name] = time.time() + self.cooldown
+                self._failures[name] = 0
+        print(f"[TTS] ❌ {name} 合成失败（连续 {failures} 次）: {error}")
+        if tripped:
+            print(f"[TTS] ⛔ {name} 已熔断，{self.cooldown:.0f}s 内不再使用")
+
+    def stats(self) -> dict:
+        return {name: {"rtf": self.rtf.get(name), "open": self._is_open(name)}
+                for name in self.engines}
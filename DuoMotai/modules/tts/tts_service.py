@@ -1,6 +1,9 @@
 # modules/tts/tts_service.py
 import os
 import sys
+import queue
+import shutil
+import itertools
 import subprocess
 import threading
 import time
@@ -8,51 +11,148 @@ import re
 import logging
 from typing import Optional
 
-# 检查各种本地TTS是否可用
-ESPEAK_AVAILABLE = False
-FESTIVAL_AVAILABLE = False
-PYGAME_INITIALIZED = False  # 添加pygame初始化状态跟踪
+import numpy as np
+
+from .tts_cache import TTSCache
+from .audio_buffer import AudioBuffer
+from .audio_player import AudioPlayer, resample
+from .tts_splice import trim_silence, splice
+from .tts_engines import (EngineRegistry, IndexTTSEngine, ESpeakEngine, FestivalEngine,
+                          Pyttsx3Engine, GTTSEngine)
 
-try:
-    subprocess.run(["espeak", "--version"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    ESPEAK_AVAILABLE = True
-except (subprocess.CalledProcessError, FileNotFoundError):
-    ESPEAK_AVAILABLE = False
+PYGAME_INITIALIZED = False  # 添加pygame初始化状态跟踪
 
-try:
-    subprocess.run(["festival", "--version"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    FESTIVAL_AVAILABLE = True
-except (subprocess.CalledProcessError, FileNotFoundError):
-    FESTIVAL_AVAILABLE = False
+# engine 参数与引擎注册表中引擎名的对应关系；"auto" 表示完全按实测速度排序
+ENGINE_ALIASES = {"local": "indextts", "auto": None}
 
 logger = logging.getLogger(__name__)
 
+# 流式播报的分句标点（切分点保留在前一句末尾）
+SENTENCE_PUNCTUATION = "，。！？；、,!?;"
+SENTENCE_SPLIT_PATTERN = re.compile(f"(?<=[{SENTENCE_PUNCTUATION}])")
+
+# 合并播报请求时比较文本前忽略的字符
+COALESCE_IGNORE_PATTERN = re.compile(r"[\s，。！？；、,!?;：:]")
+
+# 模板片段拼接：相邻片段的交叉淡化时长，以及以标点结尾的片段后插入的停顿
+SPLICE_CROSSFADE_MS = 15
+SPLICE_PAUSE_MS = 150
+
+
+def split_sentences(text: str, min_chars: int = 4) -> list:
+    """
+    按中文标点把文本切分为短句，过短的片段并入下一句，避免合成大量零碎音频
+    """
+    chunks = []
+    pending = ""
+    for piece in SENTENCE_SPLIT_PATTERN.split(text):
+        pending += piece.strip()
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ""
+    if pending:
+        if chunks and len(pending) < min_chars:
+            chunks[-1] += pending
+        else:
+            chunks.append(pending)
+    return chunks
+
+
+# 播报优先级（数值越小越先播）
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class SpeechRequest:
+    """
+    一次播报请求，带独立的取消标志；排队中或播放中都可以随时取消
+    """
+    _counter = itertools.count()
+
+    def __init__(self, text: str, filename: str = "speech.wav", priority: int = PRIORITY_NORMAL,
+                 supersede: bool = True, fragments: Optional[list] = None):
+        self.text = text
+        self.fragments = fragments           # 模板片段，非空时拼接播放
+        self.filename = filename
+        self.priority = priority
+        self.supersede = supersede
+        self.seq = next(SpeechRequest._counter)
+        self.created = time.time()
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def __lt__(self, other: "SpeechRequest") -> bool:
+        # 同优先级按提交顺序
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
 class TTSService:
     """
     语音合成服务模块（Text-To-Speech）
     支持：
       ✅ 本地 IndexTTS 模型（通过 ModelScope）
-      ✅ Google TTS 作为回退
-      ✅ eSpeak 和 Festival 作为备用方案
+      ✅ eSpeak、Festival、pyttsx3 作为备用方案，按实测速度排序回退
+      ✅ Google TTS 作为最后的回退
     """
     def __init__(self, engine: str = "local", voice: Optional[str] = None, rate: int = 180,
-                 output_dir: str = "outputs/tts", model_path: Optional[str] = None):
+                 output_dir: str = "outputs/tts", model_path: Optional[str] = None,
+                 use_cache: bool = True, cache_max_mb: int = 200, cache_max_age_days: float = 7,
+                 streaming: bool = True, in_process_playback: bool = True,
+                 coalesce_window: float = 0.08):
         self.engine = engine
         self.voice = voice
         self.rate = rate
         self.output_dir = output_dir
         self.model_path = model_path or "/mnt/data/modelscope_cache/hub/pengzhendong"
         self.is_speaking = False
-        self.speak_thread = None
-        self.current_playback_thread = None  # 添加当前播放线程跟踪
-        self.should_stop_playback = False    # 添加播放中断标志
+        # 常驻播报线程：按优先级消费播报请求，提交请求不阻塞调用方
+        self._requests = queue.PriorityQueue()
+        self._pending = set()                # 排队中的请求
+        self._current_request = None         # 正在合成/播放的请求
+        self._queue_lock = threading.Lock()
+        self._worker = None
+        # 请求合并：新请求先等待 coalesce_window 秒再开始合成，期间到达的重复或扩展请求会被合并，
+        # 同一轮对话只合成一次
+        self.coalesce_window = coalesce_window
+        self.coalesced = 0
+        # 流式播报：按句切分，第一句合成完即开始播放，后续句子边播边合成
+        self.streaming = streaming
+        # 进程内播放：常驻 sounddevice 输出流，失败时才回退到 pygame / 外部播放器
+        self.player = AudioPlayer() if in_process_playback else None
+        # 对外发布播放状态：录音端据此在播报期间屏蔽麦克风
+        self.playback_active = threading.Event()
+        self.last_playback_end = 0.0
+        self._prewarm_generation = 0
         os.makedirs(output_dir, exist_ok=True)
 
+        # 语音缓存：相同文本/引擎/音色/语速只合成一次
+        self.cache = None
+        if use_cache:
+            self.cache = TTSCache(os.path.join(output_dir, "cache"),
+                                  max_bytes=cache_max_mb * 1024 * 1024,
+                                  max_age=cache_max_age_days * 24 * 3600)
+
         # 初始化 IndexTTS 模型
         self.index_tts = None
         if self.engine == "local":
             self._load_index_tts_model()
 
+        # TTS 引擎注册表：首次合成时才检测可用性并测速，结果缓存在输出目录中
+        self.engines = EngineRegistry(
+            [IndexTTSEngine(lambda: self.index_tts), ESpeakEngine(), FestivalEngine(),
+             Pyttsx3Engine(voice, rate), GTTSEngine()],
+            preferred=ENGINE_ALIASES.get(engine, engine),
+            state_file=os.path.join(output_dir, "engines.json"),
+        )
+
     # ============================================================
     # 模型加载
     # ============================================================
@@ -85,25 +185,70 @@ class TTSService:
     def synthesize(self, text: str, filename: str = "speech.wav") -> str:
         """
         将文本合成为语音文件，返回音频路径
+        启用缓存时返回缓存文件；filename 仅在关闭缓存时使用
+        播报内部直接使用内存中的音频（synthesize_audio），只有需要文件的调用方才用这个接口
+        """
+        audio = self.synthesize_audio(text)
+        if audio is None:
+            return ""
+        if self.cache is not None:
+            path = self.cache.file_for(self._cache_key(text))
+            if path is not None:
+                return path
+        output_path = os.path.join(self.output_dir, filename)
+        audio.write_wav(output_path)
+        return output_path
+
+    def synthesize_audio(self, text: str) -> Optional[AudioBuffer]:
+        """
+        将文本合成为内存中的音频，失败返回 None
         """
         if not self._is_valid_text(text):
             print(f"[TTSService] ⚠️ 无效文本，跳过合成: {text}")
-            return ""
+            return None
+        return self._synthesize(text)
 
-        output_path = os.path.join(self.output_dir, filename)
+    def _cache_key(self, text: str, engine: Optional[str] = None) -> str:
+        """
+        缓存键包含实际合成的引擎名（而不是 "local"/"auto" 这类配置名），默认取排序第一的引擎
+        """
+        engine = engine or self.engines.primary() or self.engine
+        return TTSCache.make_key(text, engine, self.voice, self.rate)
 
-        # 根据可用的TTS引擎选择合适的合成方式
-        if self.engine == "local" and self.index_tts:
-            self._synthesize_with_index_tts(text, output_path)
-        elif ESPEAK_AVAILABLE:
-            self._synthesize_with_espeak(text, output_path)
-        elif FESTIVAL_AVAILABLE:
-            self._synthesize_with_festival(text, output_path)
-        else:
-            self._synthesize_with_gtts(text, output_path)
+    def _synthesize(self, text: str) -> Optional[AudioBuffer]:
+        """
+        合成（不做文本过滤，流式播报的分句可能单独不满足过滤条件）
+        启用缓存时先查内存层和磁盘，合成结果写入缓存
+        """
+        return self._synthesize_with_engine(text)[0]
 
-        print(f"[TTSService] ✅ 生成语音文件: {output_path}")
-        return output_path
+    def _synthesize_with_engine(self, text: str) -> tuple:
+        """
+        同 _synthesize，同时返回音频是否来自首选引擎
+        只缓存首选引擎的结果：回退引擎（espeak、gTTS 等）的音质差得多，
+        不能占用首选引擎的缓存键，否则首选引擎恢复后仍会播放回退音频直到缓存过期
+        """
+        primary = self.engines.primary()
+        key = None
+        if self.cache is not None:
+            key = self._cache_key(text, primary)
+            cached = self.cache.get_audio(key)
+            if cached is not None:
+                print(f"[TTSService] ⚡ 命中语音缓存: {text}")
+                return cached, True
+
+        # 按引擎排序依次尝试，连续失败的引擎会被熔断；模型不保证线程安全，由注册表串行调用
+        audio, engine = self.engines.synthesize(text)
+        if audio is None:
+            print(f"[TTSService] ❌ 所有 TTS 引擎均合成失败: {text}")
+            return None, False
+
+        from_primary = engine == primary
+        if key is not None and from_primary:
+            self.cache.put_audio(key, audio)
+        fallback = "" if from_primary else f"，回退引擎 {engine}，不缓存"
+        print(f"[TTSService] ✅ 合成语音: {text}（{audio.duration:.1f}s{fallback}）")
+        return audio, from_primary
 
     # ============================================================
     # 文本过滤
@@ -149,108 +294,361 @@ class TTSService:
         return False
 
     # ============================================================
-    # 使用本地 IndexTTS
+    # 播放接口
     # ============================================================
-    def _synthesize_with_index_tts(self, text: str, output_path: str):
+    def speak(self, text: str, filename: str = "speech.wav") -> str:
+        return self.synthesize(text, filename)
+
+    def speak_and_play(self, text: str, filename: str = "speech.wav", priority: int = PRIORITY_NORMAL,
+                       supersede: bool = True) -> Optional["SpeechRequest"]:
         """
-        使用 ModelScope 加载的 IndexTTS 模型进行合成
+        异步合成并播放：提交请求后立即返回，由常驻播报线程按优先级依次处理
+        supersede=True 时新请求取代所有排队中和正在播放的请求
+        返回 SpeechRequest，可用于单独取消或等待播报结束
         """
-        try:
-            result = self.index_tts(input=text)
-            audio_bytes = result["output_wav"]
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with open(output_path, "wb") as f:
-                f.write(audio_bytes)
-            print(f"[TTS] 🗣️ IndexTTS 本地合成成功 → {output_path}")
-        except Exception as e:
-            print(f"[TTS] ❌ IndexTTS 合成失败: {e}")
-            print("[TTS] ⚙️ 回退至 Google TTS")
-            self._synthesize_with_gtts(text, output_path)
+        if not self._is_valid_text(text):
+            print(f"[TTSService] 无效文本，跳过播放: {text}")
+            return None
+        return self._submit(SpeechRequest(text, filename, priority, supersede))
 
-    # ============================================================
-    # 使用 eSpeak
-    # ============================================================
-    def _synthesize_with_espeak(self, text: str, output_path: str):
+    def speak_fragments(self, fragments: list, filename: str = "speech.wav", priority: int = PRIORITY_NORMAL,
+                        supersede: bool = True) -> Optional["SpeechRequest"]:
         """
-        使用 eSpeak 合成语音
+        模板播报：固定片段、商品名、价格等分别合成并缓存，播放时直接拼接 PCM，
+        整句只需合成缓存中缺少的片段（通常为零）
         """
-        try:
-            cmd = ["espeak", "-v", "zh", "-s", "150", "-w", output_path, text]
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            print(f"[TTS] 🗣️ eSpeak 合成成功 → {output_path}")
-        except Exception as e:
-            print(f"[TTS] ❌ eSpeak 合成失败: {e}")
-            self._synthesize_with_gtts(text, output_path)
+        fragments = [f for f in fragments if f and f.strip()]
+        text = "".join(fragments)
+        if not self._is_valid_text(text):
+            print(f"[TTSService] 无效文本，跳过播放: {text}")
+            return None
+        return self._submit(SpeechRequest(text, filename, priority, supersede, fragments=fragments))
 
-    # ============================================================
-    # 使用 Festival
-    # ============================================================
-    def _synthesize_with_festival(self, text: str, output_path: str):
+    @staticmethod
+    def _coalesce_text(text: str) -> str:
+        return COALESCE_IGNORE_PATTERN.sub("", text)
+
+    def _submit(self, request: "SpeechRequest") -> "SpeechRequest":
+        supersede = request.supersede
+        new_text = self._coalesce_text(request.text)
+        with self._queue_lock:
+            # 合并窗口内的请求：内容已被覆盖的新请求直接丢弃，被新请求扩展的旧请求取消
+            live = list(self._pending)
+            if self._current_request is not None:
+                live.append(self._current_request)
+            for other in live:
+                if other.cancelled or request.created - other.created > self.coalesce_window:
+                    continue
+                other_text = self._coalesce_text(other.text)
+                if new_text in other_text:
+                    self.coalesced += 1
+                    print(f"[TTSService] 🔗 合并重复播报请求: {request.text}")
+                    return other
+                if other_text in new_text:
+                    self.coalesced += 1
+                    print(f"[TTSService] 🔗 合并播报请求: {other.text} → {request.text}")
+                    other.cancel()
+                    self._pending.discard(other)
+
+            if supersede:
+                for pending in self._pending:
+                    pending.cancel()
+                self._pending.clear()
+                if self._current_request is not None:
+                    self._current_request.cancel()
+            self._pending.add(request)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+                self._worker.start()
+        if supersede:
+            self._stop_player()
+        self._requests.put(request)
+        return request
+
+    def _worker_loop(self):
         """
-        使用 Festival 合成语音
+        常驻播报线程：取出优先级最高的请求，跳过已取消的
         """
+        while True:
+            request = self._requests.get()
+            with self._queue_lock:
+                self._pending.discard(request)
+                if request.cancelled:
+                    request.done.set()
+                    continue
+                self._current_request = request
+            try:
+                # 合并窗口：短暂等待可能紧随其后的扩展或取代请求，被取消则不再合成
+                # 只有可被取代、且需要现场合成的请求才值得等待；已缓存的直接播放，被取代时播放会立即中断
+                if request.supersede and not self._is_cached(request):
+                    hold = request.created + self.coalesce_window - time.time()
+                    if hold > 0 and request.cancel_event.wait(hold):
+                        continue
+                self._play_request(request)
+            finally:
+                with self._queue_lock:
+                    self._current_request = None
+                request.done.set()
+
+    def _play_request(self, request: "SpeechRequest"):
+        text, filename, cancel = request.text, request.filename, request.cancel_event
         try:
-            cmd = f'echo "{text}" | text2wave -o {output_path}'
-            subprocess.run(cmd, shell=True, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            print(f"[TTS] 🗣️ Festival 合成成功 → {output_path}")
+            chunks = split_sentences(text) if self.streaming and not request.fragments else [text]
+            if len(chunks) > 1:
+                self.playback_active.set()
+                try:
+                    self._stream_and_play(chunks, filename, cancel)
+                finally:
+                    self.playback_active.clear()
+                    if not cancel.is_set():
+                        self.last_playback_end = time.time()
+                return
+
+            if request.fragments:
+                audio = self.synthesize_fragments(request.fragments, cancel)
+            else:
+                audio = self.synthesize_audio(text)
+            if audio is None or cancel.is_set():
+                return
+            self.playback_active.set()
+            try:
+                self._play_audio(audio, filename)
+            finally:
+                self.playback_active.clear()
+                # 被打断时不计尾部余量，录音端立即恢复
+                if not cancel.is_set():
+                    self.last_playback_end = time.time()
         except Exception as e:
-            print(f"[TTS] ❌ Festival 合成失败: {e}")
-            self._synthesize_with_gtts(text, output_path)
+            print(f"[TTSService] 播放音频时出错: {e}")
+
+    @property
+    def should_stop_playback(self) -> bool:
+        """
+        当前播报请求是否已被取消（播放循环据此中断）
+        """
+        request = self._current_request
+        return request is not None and request.cancelled
+
+    def _has_live_work(self) -> bool:
+        return bool(self._pending) or self._current_request is not None
+
+    def _is_cached(self, request: "SpeechRequest") -> bool:
+        """
+        播报请求的音频是否已全部缓存（不需要合成）
+        """
+        if self.cache is None:
+            return False
+        if request.fragments:
+            return self.cache.contains(self._splice_key(request.fragments))
+        return all(self.cache.contains(self._cache_key(unit)) for unit in self._units(request.text))
+
+    def _splice_key(self, fragments: list) -> str:
+        return self._cache_key("\x1e".join(fragments), f"{self.engines.primary() or self.engine}:splice")
+
+    def _units(self, text: str) -> list:
+        """
+        合成与缓存的最小单位：流式播报时为分句，否则为整段文本
+        """
+        return split_sentences(text) if self.streaming else [text]
+
+    def synthesize_fragments(self, fragments: list,
+                             cancel: Optional[threading.Event] = None) -> Optional[AudioBuffer]:
+        """
+        逐个合成（或从缓存读取）模板片段，去掉首尾静音后交叉淡化拼接为一段音频
+        """
+        splice_key = None
+        if self.cache is not None:
+            splice_key = self._splice_key(fragments)
+            cached = self.cache.get_audio(splice_key)
+            if cached is not None:
+                return cached
+
+        segments = []
+        sample_rate = None
+        pause = None
+        complete = True  # 所有片段都由首选引擎合成成功时才缓存拼接结果
+        for fragment in fragments:
+            for unit in self._units(fragment):
+                if cancel is not None and cancel.is_set():
+                    return None
+                audio, from_primary = self._synthesize_with_engine(unit)
+                if audio is None:
+                    complete = False
+                    continue
+                complete = complete and from_primary
+                if sample_rate is None:
+                    sample_rate = audio.sample_rate
+                    pause = np.zeros(sample_rate * SPLICE_PAUSE_MS // 1000, dtype=np.float32)
+                samples = resample(audio.to_float(), audio.sample_rate, sample_rate)
+                segments.append(trim_silence(samples, sample_rate))
+                if unit[-1] in SENTENCE_PUNCTUATION:
+                    segments.append(pause)
+        if not segments:
+            return None
+
+        audio = AudioBuffer.from_float(splice(segments, sample_rate, SPLICE_CROSSFADE_MS), sample_rate)
+        # 缺片段或含回退引擎片段的拼接结果只播放这一次，不缓存
+        if splice_key is not None and complete:
+            self.cache.put_audio(splice_key, audio)
+        return audio
+
+    def _stream_and_play(self, chunks: list, filename: str, cancel: threading.Event):
+        """
+        流式播报：合成线程逐句合成，当前线程按顺序播放；
+        首句音频的等待时间只取决于第一句的长度，取消时合成和播放都会停止
+        """
+        start = time.time()
+        audio_queue = queue.Queue(maxsize=2)  # 最多提前合成两句
+
+        def producer():
+            for chunk in chunks:
+                if cancel.is_set():
+                    break
+                audio = self._synthesize(chunk)
+                if audio is None:
+                    continue
+                while not cancel.is_set():
+                    try:
+                        audio_queue.put(audio, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+            if not cancel.is_set():
+                audio_queue.put(None)
+
+        threading.Thread(target=producer, daemon=True).start()
+
+        played = 0
+        while not cancel.is_set():
+            try:
+                audio = audio_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if audio is None:
+                break
+            if played == 0:
+                print(f"[TTSService] ⏱️ 首句音频就绪: {(time.time() - start) * 1000:.0f} ms")
+            self._play_audio(audio, filename)
+            played += 1
+            if self.should_stop_playback:
+                break
 
     # ============================================================
-    # 使用 Google TTS
+    # 后台预合成
     # ============================================================
-    def _synthesize_with_gtts(self, text: str, output_path: str):
+    def prewarm(self, texts, min_interval: float = 1.0, niceness: int = 10):
         """
-        使用 Google TTS 合成语音（在线）
+        在后台低优先级线程中把常用语句预先合成到缓存
+        - 有实时播报（合成或播放）时暂停，不与实时请求争抢模型和 CPU
+        - 每两句之间至少间隔 min_interval 秒
+        - 再次调用会取代尚未完成的上一轮预合成（例如商品目录变化）
         """
-        try:
-            from gtts import gTTS
+        if self.cache is None:
+            print("[TTSService] ⚠️ 未启用语音缓存，跳过预合成")
+            return
+        # 按合成单位预合成（流式播报时为分句），各商品共用的句子只合成一次
+        texts = [unit for text in texts if text and text.strip() for unit in self._units(text)]
+        self._prewarm_generation += 1
+        thread = threading.Thread(target=self._prewarm_thread,
+                                  args=(list(dict.fromkeys(texts)), self._prewarm_generation,
+                                        min_interval, niceness),
+                                  daemon=True)
+        thread.start()
+
+    def _prewarm_thread(self, texts, generation: int, min_interval: float, niceness: int):
+        if niceness:
+            try:
+                # Linux 下 nice 值按线程生效
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+            except (AttributeError, OSError):
+                pass
+
+        done = 0
+        start = time.time()
+        for text in texts:
+            if generation != self._prewarm_generation:
+                return
             if not text or not text.strip():
-                text = " "
-            # 明确指定使用中文语言参数
-            tts = gTTS(text=text, lang='zh-CN', slow=False, lang_check=False)
-            tts.save(output_path)
-            print(f"[TTS] 🌐 Google TTS 合成完成 → {output_path}")
-        except Exception as e:
-            print(f"[TTS] ❌ Google TTS 合成失败: {e}")
+                continue
+            if self.cache.contains(self._cache_key(text)):
+                continue
+            # 实时请求优先
+            while self._has_live_work() or self.playback_active.is_set():
+                time.sleep(0.2)
+                if generation != self._prewarm_generation:
+                    return
+            self._synthesize(text)
+            done += 1
+            time.sleep(min_interval)
+        print(f"[TTSService] ✅ 预合成完成: 新合成 {done}/{len(texts)} 句，耗时 {time.time() - start:.1f}s")
 
     # ============================================================
-    # 播放接口
+    # 播放状态
     # ============================================================
-    def speak(self, text: str, filename: str = "speech.wav") -> str:
-        return self.synthesize(text, filename)
+    def is_playing(self, tail_margin: float = 0.0) -> bool:
+        """
+        是否正在播放（或刚结束不足 tail_margin 秒，扬声器余音仍可能被麦克风拾取）
+        """
+        if self.playback_active.is_set():
+            return True
+        return time.time() - self.last_playback_end < tail_margin
 
-    def speak_and_play(self, text: str, filename: str = "speech.wav"):
+    def stop_playback(self):
         """
-        异步合成并播放
+        立即停止当前播放（例如用户插话打断）
         """
-        if not self._is_valid_text(text):
-            print(f"[TTSService] 无效文本，跳过播放: {text}")
+        with self._queue_lock:
+            for pending in self._pending:
+                pending.cancel()
+            self._pending.clear()
+            if self._current_request is not None:
+                self._current_request.cancel()
+        self.playback_active.clear()
+        self.last_playback_end = 0.0
+        self._stop_player()
+
+    def _stop_player(self):
+        """
+        立即停止正在播放的音频
+        """
+        if self.player is not None:
+            self.player.stop()
+        if PYGAME_INITIALIZED:
+            try:
+                import pygame
+                pygame.mixer.music.stop()
+            except Exception:
+                pass
+
+    def _play_audio(self, audio: AudioBuffer, filename: str = "speech.wav"):
+        """
+        播放内存中的音频：优先由进程内播放器直接播放，不经过磁盘；
+        播放器不可用时写入 filename 再用其他方式播放
+        """
+        if self.should_stop_playback:
+            return
+        if len(audio) == 0:
+            print("[TTS] ⚠️ 音频为空，跳过播放")
             return
 
-        # 中断当前播放
-        self.should_stop_playback = True
-        if self.current_playback_thread and self.current_playback_thread.is_alive():
-            self.current_playback_thread.join(timeout=1.0)  # 等待最多1秒
-        
-        # 启动新的播放线程
-        self.current_playback_thread = threading.Thread(target=self._speak_and_play_thread, args=(text, filename))
-        self.current_playback_thread.daemon = True
-        self.current_playback_thread.start()
-
-    def _speak_and_play_thread(self, text: str, filename: str):
-        # 不检查播放状态，允许连续播放
-        self.should_stop_playback = False
-        try:
-            audio_path = self.speak(text, filename)
-            if not audio_path or self.should_stop_playback:
+        # 优先进程内播放（常驻输出流，无需启动播放器进程）
+        if self.player is not None:
+            try:
+                request = self._current_request
+                self.player.play(audio, request.cancel_event if request else None)
                 return
-            self._play_audio(audio_path)
-        except Exception as e:
-            print(f"[TTSService] 播放音频时出错: {e}")
+            except Exception as e:
+                print(f"[TTS] ⚠️ 进程内播放失败，改用其他播放方式: {e}")
+
+        audio_path = os.path.join(self.output_dir, filename)
+        try:
+            audio.write_wav(audio_path)
+        except OSError as e:
+            print(f"[TTS] ❌ 写入音频文件失败: {e}")
+            return
+        self._play_audio_file(audio_path)
 
-    def _play_audio(self, audio_path: str):
+    def _play_audio_file(self, audio_path: str):
         """
         播放音频文件（兼容Linux/macOS/Windows）
         """
@@ -269,7 +667,7 @@ class TTSService:
             if os.path.getsize(audio_path) == 0:
                 print(f"[TTS] ⚠️ 音频文件为空: {audio_path}")
                 return
-            
+
             # 尝试使用pygame播放
             try:
                 import pygame
@@ -335,7 +733,8 @@ class TTSService:
                 for player in players:
                     try:
                         # 检查播放器是否存在
-                        subprocess.run(["which", player], check=True, stdout=subprocess.DEVNULL)
+                        if shutil.which(player) is None:
+                            continue
                         print(f"[TTS] 使用播放器: {player}")
                         # 检查是否需要中断播放
                         if not self.should_stop_playback:
@@ -381,17 +780,22 @@ class TTSService:
         product_price = product_info.get("price", "未知价格")
         product_description = product_info.get("description", "")
         
-        # 构造商品信息播报文本
-        info_text = f"为您找到{product_name}, 价格{product_price}, {product_description}"
+        # 按模板片段播报，商品名、价格等片段合成一次后即可反复拼接
+        fragments = ["为您找到", f"{product_name},", "价格", f"{product_price},", product_description]
         filename = f"product_{int(time.time())}.wav"
         
-        self.speak_and_play(info_text, filename)
+        self.speak_fragments(fragments, filename)
 
     def cleanup(self):
         """
         清理资源，特别是pygame资源
         """
         global PYGAME_INITIALIZED
+        if self.player is not None:
+            self.player.close()
+        # 等待后台线程把新合成的语音写入缓存目录
+        if self.cache is not None:
+            self.cache.flush()
         try:
             import pygame
             if PYGAME_INITIALIZED:
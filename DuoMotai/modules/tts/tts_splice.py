@@ -0,0 +1,38 @@
+# modules/tts/tts_splice.py
+from typing import List
+
+import numpy as np
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int, threshold: float = 0.01, keep_ms: int = 30) -> np.ndarray:
+    """
+    去掉片段首尾的静音，两端各保留 keep_ms 毫秒（零拷贝切片）
+    """
+    voiced = np.flatnonzero(np.abs(samples) > threshold)
+    if len(voiced) == 0:
+        return samples[:0]
+    keep = sample_rate * keep_ms // 1000
+    return samples[max(0, voiced[0] - keep):voiced[-1] + keep + 1]
+
+
+def splice(segments: List[np.ndarray], sample_rate: int, crossfade_ms: int = 15) -> np.ndarray:
+    """
+    按顺序拼接多段 PCM，相邻片段之间做线性交叉淡化，避免拼接处的爆音
+    """
+    segments = [s for s in segments if len(s)]
+    if not segments:
+        return np.zeros(0, dtype=np.float32)
+    fade = sample_rate * crossfade_ms // 1000
+    overlaps = [min(fade, len(a), len(b)) for a, b in zip(segments, segments[1:])]
+    out = np.zeros(sum(len(s) for s in segments) - sum(overlaps), dtype=np.float32)
+
+    pos = 0
+    for i, segment in enumerate(segments):
+        n = overlaps[i - 1] if i else 0
+        if n:
+            ramp = np.linspace(0.0, 1.0, n, endpoint=False, dtype=np.float32)
+            out[pos - n:pos] = out[pos - n:pos] * (1.0 - ramp) + segment[:n] * ramp
+        out[pos:pos + len(segment) - n] = segment[n:]
+        pos += len(segment) - n
+    return out
+
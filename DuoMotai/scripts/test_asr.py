@@ -1,19 +1,25 @@
 import os
-import uuid
+import sys
+import io
+import asyncio
 import logging
 import pyaudio
 import numpy as np
 import soundfile as sf
 import sherpa_onnx
 import uvicorn
-from fastapi import FastAPI, File, UploadFile
-from pathlib import Path
+from fastapi import FastAPI, File, UploadFile, WebSocket, WebSocketDisconnect
 from threading import Thread
 import time
-import noisereduce as nr
 import webrtcvad
 import socket
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.asr.vad_segmenter import VADSegmenter
+from modules.asr.noise_suppressor import StreamingNoiseSuppressor
 
 # =========================
 # 日志配置
@@ -30,10 +36,16 @@ logger = logging.getLogger(__name__)
 ASR_MODEL_PATH = "/mnt/data/modelscope_cache/hub/xiaowangge/sherpa-onnx-sense-voice-small"
 
 # =========================
-# 临时音频存放目录
+# 批量解码配置
+# =========================
+DECODE_MAX_BATCH = 8        # 单次 decode_streams 最多合并的请求数
+DECODE_MAX_WAIT_MS = 20     # 第一个请求到达后最多等待多久凑批
+
+# =========================
+# WebSocket 流式识别配置
 # =========================
-TMP_AUDIO_DIR = Path("./tmp_audio")
-TMP_AUDIO_DIR.mkdir(exist_ok=True)
+WS_SAMPLE_RATE = 16000          # 客户端发送 16 kHz 16-bit 单声道 PCM
+WS_PARTIAL_INTERVAL_MS = 800    # 说话过程中每累积多少新音频推送一次中间结果
 
 # =========================
 # ASR 模型类
@@ -70,28 +82,172 @@ class STTModel:
         self.recognizer.decode_stream(stream)
         return stream.result.text
 
+    def transcribe_batch(self, items) -> list:
+        """
+        批量识别：items 为 [(音频, 采样率), ...]，一次 decode_streams 调用完成
+        """
+        if self.recognizer is None:
+            raise RuntimeError("Model not loaded")
+        streams = []
+        for audio_data, sample_rate in items:
+            stream = self.recognizer.create_stream()
+            stream.accept_waveform(sample_rate, audio_data)
+            streams.append(stream)
+        self.recognizer.decode_streams(streams)
+        return [stream.result.text for stream in streams]
+
+# =========================
+# 解码调度器：合并并发请求
+# =========================
+class DecodeBatcher:
+    """
+    把并发到达的识别请求合并成一批，在专用线程中调用 decode_streams
+    - 第一个请求到达后最多等待 max_wait_ms 凑批，批满立即解码
+    - 解码在线程池中执行，不阻塞事件循环；上一批解码期间到达的请求自动组成下一批
+    """
+    def __init__(self, model: STTModel, max_batch: int = DECODE_MAX_BATCH,
+                 max_wait_ms: int = DECODE_MAX_WAIT_MS):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-decode")
+        self._task = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def transcribe(self, audio_data: np.ndarray, sample_rate: int) -> str:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((audio_data, sample_rate, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [(audio_data, sample_rate) for audio_data, sample_rate, _ in batch]
+            try:
+                start = time.perf_counter()
+                texts = await loop.run_in_executor(self.executor, self.model.transcribe_batch, items)
+                logger.info(f"批量解码 {len(batch)} 条，耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, _, future), text in zip(batch, texts):
+                if not future.done():
+                    future.set_result(text)
+
 # =========================
 # FastAPI 初始化
 # =========================
 app = FastAPI(title="Offline ASR Service")
 stt_model = STTModel(ASR_MODEL_PATH)
 stt_model.load_model()
+decode_batcher = DecodeBatcher(stt_model)
+
+@app.on_event("startup")
+async def start_decode_batcher():
+    decode_batcher.start()
+
+def decode_upload(data: bytes):
+    """
+    在内存中解码上传的音频（不落盘），返回 (单声道音频, 采样率)；采样率转换由识别器在解码线程中完成
+    """
+    audio_data, sr = sf.read(io.BytesIO(data), dtype='float32')
+    if audio_data.ndim > 1:
+        audio_data = audio_data[:, 0]
+    return audio_data, sr
 
 @app.post("/v1/stt")
 async def speech_to_text(file: UploadFile = File(...)):
-    tmp_file_path = TMP_AUDIO_DIR / f"{uuid.uuid4()}{Path(file.filename).suffix}"
     try:
-        with open(tmp_file_path, "wb") as f:
-            f.write(await file.read())
-        audio_data, sr = sf.read(tmp_file_path, dtype='int16')
-        text = stt_model.transcribe(audio_data)
+        # 音频解码在线程池中执行，不阻塞事件循环
+        data = await file.read()
+        audio_data, sr = await asyncio.get_running_loop().run_in_executor(None, decode_upload, data)
+        text = await decode_batcher.transcribe(audio_data, sr)
         return {"code": 200, "msg": "success", "data": {"text": text}}
     except Exception as e:
         logger.error(f"STT error: {e}")
         return {"code": 500, "msg": str(e), "data": None}
+
+@app.websocket("/v1/stt/stream")
+async def speech_to_text_stream(websocket: WebSocket):
+    """
+    流式识别：客户端持续发送 16 kHz 16-bit 单声道 PCM 二进制帧，发送文本 "end" 立即结束当前语句
+    服务端按 VAD 切分语句，推送 {"type": "partial" | "final", "segment": 序号, "text": 文本}
+    所有会话共用同一个识别模型，解码请求经 decode_batcher 合并
+    """
+    await websocket.accept()
+    segmenter = VADSegmenter(sample_rate=WS_SAMPLE_RATE)
+    partial_interval = WS_SAMPLE_RATE * WS_PARTIAL_INTERVAL_MS // 1000
+    session = {"segment": 0, "since_partial": 0, "partial_task": None}
+
+    async def send_final(utterance):
+        # 先结束当前语句再等待解码和发送，期间完成的中间结果序号不匹配，不会在最终结果之后推送
+        segment = session["segment"]
+        session["segment"] += 1
+        session["since_partial"] = 0
+        text = await decode_batcher.transcribe(utterance, WS_SAMPLE_RATE)
+        await websocket.send_json({"type": "final", "segment": segment, "text": text})
+
+    async def send_partial(segment, audio):
+        try:
+            text = await decode_batcher.transcribe(audio, WS_SAMPLE_RATE)
+        except Exception as e:
+            logger.error(f"partial decode error: {e}")
+            return
+        # 该语句已输出最终结果时不再推送过期的中间结果
+        if text and segment == session["segment"]:
+            await websocket.send_json({"type": "partial", "segment": segment, "text": text})
+
+    logger.info(f"🔌 WebSocket 会话开始: {websocket.client}")
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            data = message.get("bytes")
+            if data:
+                pcm = np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16).astype(np.float32) / 32768.0
+                for utterance in segmenter.process(pcm):
+                    await send_final(utterance)
+
+                # 说话过程中定期对已有音频解码，上一次中间结果未返回时跳过
+                if segmenter.in_speech:
+                    session["since_partial"] += len(pcm)
+                    task = session["partial_task"]
+                    if session["since_partial"] >= partial_interval and (task is None or task.done()):
+                        session["since_partial"] = 0
+                        session["partial_task"] = asyncio.create_task(
+                            send_partial(session["segment"], segmenter.current()))
+            elif message.get("text") == "end":
+                utterance = segmenter.flush()
+                if utterance is not None:
+                    await send_final(utterance)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"WebSocket STT error: {e}")
     finally:
-        if tmp_file_path.exists():
-            tmp_file_path.unlink()
+        task = session["partial_task"]
+        if task is not None and not task.done():
+            task.cancel()
+        logger.info(f"🔌 WebSocket 会话结束: {websocket.client}")
 
 # =========================
 # VAD + 降噪 + 实时录音
@@ -128,6 +284,8 @@ def record_audio():
     frames = []
     silence_counter = 0
     in_speech = False
+    # 流式降噪：噪声谱从非语音帧持续更新，每帧到达即降噪，语句结束时无需再整体处理
+    denoiser = StreamingNoiseSuppressor(hop=FRAME_SIZE // 2)
 
     try:
         while True:
@@ -142,6 +300,7 @@ def record_audio():
                 frame_bytes = frame.tobytes()
                 speech_flag = is_speech(frame_bytes)
                 SPEECH_WINDOW.append(1 if speech_flag else 0)
+                frame = denoiser.process(frame.astype(np.float32) / 32768.0, is_noise=not speech_flag)
 
                 if np.mean(SPEECH_WINDOW) > SPEECH_THRESHOLD:
                     if not in_speech:
@@ -155,11 +314,7 @@ def record_audio():
                     frames.append(frame)
                     if silence_counter > MAX_SILENCE_FRAMES:
                         logger.info("🛑 检测到语音结束，开始识别...")
-                        audio_chunk = np.concatenate(frames)
-
-                        # 降噪
-                        enhanced = nr.reduce_noise(y=audio_chunk.astype(np.float32), sr=RATE)
-                        enhanced = enhanced.astype(np.int16)
+                        enhanced = np.concatenate(frames)
 
                         # ASR
                         try:
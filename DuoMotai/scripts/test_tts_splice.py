@@ -0,0 +1,61 @@
+import tempfile
+
+import numpy as np
+
+from modules.tts.audio_buffer import AudioBuffer
+from modules.tts.tts_engines import TTSEngine, EngineRegistry
+from modules.tts.tts_service import TTSService
+
+
+class FlakyEngine(TTSEngine):
+    """
+    测试用引擎：failing 中的文本合成失败，其余返回 0.5s 的正弦波
+    """
+    name = "indextts"
+    benchmark = False
+
+    def __init__(self):
+        self.failing = set()
+        self.calls = []
+
+    def probe(self) -> bool:
+        return True
+
+    def synthesize_audio(self, text: str) -> AudioBuffer:
+        self.calls.append(text)
+        if text in self.failing:
+            raise RuntimeError("模拟合成失败")
+        t = np.arange(8000) / 16000
+        return AudioBuffer.from_float(0.5 * np.sin(2 * np.pi * 440 * t), 16000)
+
+
+def test_failed_fragment_is_not_cached():
+    """
+    有片段合成失败时，拼接结果不能写入缓存；引擎恢复后应重新合成完整的一句
+    """
+    output_dir = tempfile.mkdtemp(prefix="tts_splice_")
+    tts = TTSService(engine="auto", output_dir=output_dir, in_process_playback=False)
+    engine = FlakyEngine()
+    tts.engines = EngineRegistry([engine], failure_threshold=100)
+    fragments = ["这款是", "纯棉衬衫，", "价格一百元。"]
+
+    engine.failing.add("纯棉衬衫，")
+    partial = tts.synthesize_fragments(fragments)
+    assert partial is not None
+
+    engine.failing.clear()
+    engine.calls.clear()
+    full = tts.synthesize_fragments(fragments)
+    assert "纯棉衬衫，" in engine.calls, "引擎恢复后应重新合成缺失的片段"
+    assert full.duration > partial.duration
+
+    # 完整的拼接结果会被缓存，再次播报不再合成
+    engine.calls.clear()
+    again = tts.synthesize_fragments(fragments)
+    assert engine.calls == []
+    assert again.duration == full.duration
+
+
+if __name__ == "__main__":
+    test_failed_fragment_is_not_cached()
+    print("✅ 模板拼接缓存测试通过")
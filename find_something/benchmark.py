@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+识别流程基准测试工具（无界面）
+用录制好的视频、图片目录或合成画面驱动 VisionProcessor，按与 FindSomethingController 相同的
+识别逻辑（图像增强 → 连续帧确认 → 置信度阈值）逐帧处理，统计：
+- 处理帧率（frames/sec）
+- 各阶段延迟分位数（ROI、粗筛、embedding、精排、总耗时）
+- 每个带标签素材的确认时间（time-to-confirmation）及是否识别正确
+
+用法:
+    python3 find_something/benchmark.py clip1.mp4 frames_dir/ synthetic:商品图片.jpg \\
+        [--pace max|realtime] [--interval 3.0] [--labels labels.json] [--json report.json]
+
+素材标签默认取文件名（例如 耐克黑色短袖.mp4），也可以通过 --labels 指定 {素材: 商品名} 的映射
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from camera_capture import CameraCapture
+from frame_source import create_frame_source
+from vision_processor import VisionProcessor, enhance_image
+
+logger = logging.getLogger("benchmark")
+
+# 与 FindSomethingController 中弹窗的置信度阈值一致
+CONFIRM_THRESHOLD = 0.85
+
+STAGES = ["roi", "prefilter", "embed", "rerank", "total"]
+
+
+def run_clip(vp, spec, expected, pace="max", interval=0.0, fps=10.0):
+    """
+    回放一个素材并统计识别结果
+
+    Args:
+        vp (VisionProcessor): 视觉处理器（在各素材之间复用，索引只建一次）
+        spec (str): 素材描述（视频文件、图片目录或 synthetic:<图片>）
+        expected (str): 期望识别出的商品名，None 表示无标签
+        pace (str): "max" 尽可能快地处理；"realtime" 按素材帧率回放
+        interval (float): 两次识别之间的素材时间间隔（秒），0 表示每帧都识别
+        fps (float): 图片目录和合成画面的帧率
+
+    Returns:
+        tuple: (素材统计结果 dict, 各阶段耗时列表 dict)
+    """
+    source = create_frame_source(spec, fps=fps)
+    camera = CameraCapture(source=source)
+    camera.frame_interval = 0
+    camera.start_capture(show_preview=False)
+
+    vp.reset_history()
+    if vp.roi_detector is not None:
+        vp.roi_detector.reset()
+
+    timings = {stage: [] for stage in STAGES}
+    frame_idx = 0
+    recognitions = 0
+    next_recognition = 0.0
+    confirmed = None
+    wall_start = time.perf_counter()
+
+    try:
+        while True:
+            if pace == "realtime":
+                delay = wall_start + frame_idx / source.fps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            frame = camera.capture_frame()
+            if frame is None:
+                break
+            media_time = frame_idx / source.fps
+            frame_idx += 1
+            if media_time < next_recognition:
+                continue
+            next_recognition = media_time + interval
+
+            start = time.perf_counter()
+            name, score = vp.find_most_similar_stable(enhance_image(frame))
+            timings["total"].append((time.perf_counter() - start) * 1000)
+            for stage in STAGES[:-1]:
+                timings[stage].append(vp.last_timings.get(stage, 0.0))
+            recognitions += 1
+
+            if confirmed is None and name is not None and score >= CONFIRM_THRESHOLD:
+                confirmed = (name, float(score), media_time)
+    finally:
+        camera.stop_capture()
+
+    wall_time = time.perf_counter() - wall_start
+    result = {
+        "source": spec,
+        "label": expected,
+        "frames": frame_idx,
+        "recognitions": recognitions,
+        "wall_time_s": wall_time,
+        "fps": recognitions / wall_time if wall_time > 0 else 0.0,
+        "confirmed": confirmed[0] if confirmed else None,
+        "confirmed_score": confirmed[1] if confirmed else None,
+        "time_to_confirmation_s": confirmed[2] if confirmed else None,
+        "correct": (confirmed is not None and confirmed[0] == expected) if expected else None,
+    }
+    return result, timings
+
+
+def percentiles(values):
+    """
+    计算 p50 / p90 / p99 分位数（毫秒）
+    """
+    if not values:
+        return {"p50": None, "p90": None, "p99": None}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"p50": float(p50), "p90": float(p90), "p99": float(p99)}
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="识别流程基准测试（无界面）")
+    parser.add_argument("sources", nargs="+", help="视频文件、图片目录或 synthetic:<商品图片>")
+    parser.add_argument("--pace", choices=["max", "realtime"], default="max", help="回放速度")
+    parser.add_argument("--interval", type=float, default=0.0,
+                        help="两次识别之间的素材时间（秒），控制器默认为 3.0")
+    parser.add_argument("--fps", type=float, default=10.0, help="图片目录和合成画面的帧率")
+    parser.add_argument("--labels", help="JSON 文件，{素材: 期望商品名}")
+    parser.add_argument("--no-cascade", action="store_true", help="关闭级联检索，全量比对")
+    parser.add_argument("--no-roi", action="store_true", help="关闭衣物区域裁剪")
+    parser.add_argument("--json", help="将完整报告写入 JSON 文件")
+    args = parser.parse_args()
+
+    labels = {}
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+
+    vp = VisionProcessor(cascade=not args.no_cascade, roi=not args.no_roi)
+
+    clips = []
+    all_timings = {stage: [] for stage in STAGES}
+    for spec in args.sources:
+        default_label = os.path.splitext(os.path.basename(spec.rstrip("/").split(":")[-1]))[0]
+        expected = labels.get(spec, default_label if default_label in vp.names else None)
+        result, timings = run_clip(vp, spec, expected, args.pace, args.interval, args.fps)
+        clips.append(result)
+        for stage in STAGES:
+            all_timings[stage].extend(timings[stage])
+
+    total_recognitions = sum(c["recognitions"] for c in clips)
+    total_wall = sum(c["wall_time_s"] for c in clips)
+    labelled = [c for c in clips if c["label"]]
+    report = {
+        "config": {
+            "pace": args.pace,
+            "interval": args.interval,
+            "cascade": vp.cascade_enabled,
+            "roi": vp.roi_detector is not None,
+            "backend": "simulate" if vp.vlm_handler.simulate_mode else "onnx",
+        },
+        "fps": total_recognitions / total_wall if total_wall > 0 else 0.0,
+        "latency_ms": {stage: percentiles(values) for stage, values in all_timings.items()},
+        "accuracy": (sum(1 for c in labelled if c["correct"]) / len(labelled)) if labelled else None,
+        "cascade": vp.get_cascade_stats(),
+        "clips": clips,
+    }
+
+    print(f"帧率: {report['fps']:.1f} frames/sec（{total_recognitions} 次识别，{total_wall:.2f}s）")
+    print("各阶段延迟（ms）:")
+    for stage, p in report["latency_ms"].items():
+        if p["p50"] is not None:
+            print(f"  {stage:10s} p50={p['p50']:8.2f}  p90={p['p90']:8.2f}  p99={p['p99']:8.2f}")
+    print("素材结果:")
+    for c in clips:
+        ttc = f"{c['time_to_confirmation_s']:.2f}s" if c["time_to_confirmation_s"] is not None else "未确认"
+        print(f"  {c['source']}: 标签={c['label']} 确认={c['confirmed']} 确认时间={ttc} 正确={c['correct']}")
+    if report["accuracy"] is not None:
+        print(f"准确率: {report['accuracy']:.2%}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,26 +7,38 @@
 """
 
 import cv2
+import json
 import logging
+import re
+import sys
+import threading
 import time
 from pathlib import Path
 import numpy as np
 
 logger = logging.getLogger("camera_capture")
 
+# 记录上一次可用的摄像头，下次启动时优先尝试
+CAMERA_CACHE_FILE = Path.home() / ".cache" / "find_something" / "last_camera.json"
+# 单个摄像头探测的超时时间（秒），避免无摄像头的机器长时间阻塞启动
+CAMERA_PROBE_TIMEOUT = 2.0
+
 class CameraCapture:
     """
     摄像头捕获类，负责打开摄像头并捕获图像帧
     """
     
-    def __init__(self, camera_index=0):
+    def __init__(self, camera_index=0, source=None):
         """
         初始化摄像头捕获器
         
         Args:
             camera_index (int): 摄像头索引，默认为0
+            source (FrameSource, optional): 替代摄像头的帧来源（视频文件、图片目录或合成画面），
+                用于无摄像头时的回放和基准测试
         """
         self.camera_index = camera_index
+        self.source = source
         self.cap = None
         self.show_preview = False
         self.fallback_mode = False
@@ -34,30 +46,111 @@ class CameraCapture:
         self.last_frame_time = 0
         self.frame_interval = 0.1  # 最大帧率10fps
         
-    def find_available_cameras(self, max_cameras=10):
+    def _list_video_devices(self, max_cameras=10):
+        """
+        列出候选摄像头索引：Linux 下直接枚举 /dev/video* 设备节点，其他系统按索引枚举
+        """
+        if not sys.platform.startswith("linux"):
+            return list(range(max_cameras))
+        indices = []
+        for node in Path("/dev").glob("video*"):
+            match = re.fullmatch(r"video(\d+)", node.name)
+            if match:
+                indices.append(int(match.group(1)))
+        return sorted(indices)[:max_cameras]
+
+    def _open_camera(self, index):
+        """
+        打开摄像头并读取一帧进行验证
+        
+        Returns:
+            cv2.VideoCapture: 可用的摄像头对象，失败返回None
+        """
+        cap = cv2.VideoCapture(index)
+        if cap.isOpened():
+            ret, _ = cap.read()
+            if ret:
+                return cap
+        cap.release()
+        return None
+
+    def _probe_cameras(self, indices, timeout=CAMERA_PROBE_TIMEOUT):
         """
-        查找可用的摄像头设备
+        并发探测多个摄像头，每个探测都有超时限制
+        
+        Args:
+            indices (list): 候选摄像头索引
+            timeout (float): 探测超时时间（秒），所有探测共享同一截止时间
+            
+        Returns:
+            dict: {摄像头索引: 已打开的cv2.VideoCapture}
+        """
+        results = {}
+        lock = threading.Lock()
+        expired = threading.Event()
+
+        def probe(index):
+            cap = self._open_camera(index)
+            with lock:
+                # 超时后才返回的探测结果直接释放，避免设备句柄泄漏
+                if cap is not None and expired.is_set():
+                    cap.release()
+                elif cap is not None:
+                    results[index] = cap
+
+        threads = [threading.Thread(target=probe, args=(i,), daemon=True) for i in indices]
+        for t in threads:
+            t.start()
+        deadline = time.monotonic() + timeout
+        for t in threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+        with lock:
+            expired.set()
+            return dict(results)
+
+    def _load_cached_camera(self):
+        """
+        读取上次可用的摄像头索引
+        """
+        try:
+            with open(CAMERA_CACHE_FILE, "r", encoding="utf-8") as f:
+                return int(json.load(f)["camera_index"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_cached_camera(self, index):
+        """
+        记录可用的摄像头索引，供下次启动优先使用
+        """
+        try:
+            CAMERA_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(CAMERA_CACHE_FILE, "w", encoding="utf-8") as f:
+                json.dump({"camera_index": index}, f)
+        except OSError as e:
+            logger.debug(f"无法写入摄像头缓存: {e}")
+
+    def find_available_cameras(self, max_cameras=10, timeout=CAMERA_PROBE_TIMEOUT):
+        """
+        查找可用的摄像头设备（并发探测，总耗时不超过 timeout）
         
         Args:
             max_cameras (int): 最大检查的摄像头数量
+            timeout (float): 探测超时时间（秒）
             
         Returns:
             list: 可用摄像头索引列表
         """
-        available_cameras = []
-        for i in range(max_cameras):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                ret, frame = cap.read()
-                if ret:
-                    available_cameras.append(i)
+        caps = self._probe_cameras(self._list_video_devices(max_cameras), timeout)
+        for cap in caps.values():
             cap.release()
-        return available_cameras
+        return sorted(caps)
         
     def start_capture(self, show_preview=True):
         """
         启动摄像头捕获
         
+        依次尝试：上次可用的摄像头 → 指定的摄像头 → 并发探测所有设备节点
+        
         Args:
             show_preview (bool): 是否显示预览
             
@@ -65,24 +158,49 @@ class CameraCapture:
             bool: 是否成功启动摄像头
         """
         self.show_preview = show_preview
+        start = time.monotonic()
         
-        # 尝试打开指定的摄像头
-        self.cap = cv2.VideoCapture(self.camera_index)
+        # 使用外部帧来源时不打开摄像头
+        if self.source is not None:
+            logger.info(f"使用帧来源 {type(self.source).__name__}（{self.source.label}），帧率 {self.source.fps:.1f}fps")
+            return True
         
-        # 如果指定摄像头无法打开，尝试查找其他可用摄像头
-        if not self.cap.isOpened():
-            logger.warning(f"无法打开摄像头 {self.camera_index}，正在查找其他可用摄像头...")
-            available_cameras = self.find_available_cameras()
+        # 优先尝试上次可用的摄像头，然后是指定的摄像头
+        preferred = []
+        cached_index = self._load_cached_camera()
+        if cached_index is not None:
+            preferred.append(cached_index)
+        if self.camera_index not in preferred:
+            preferred.append(self.camera_index)
+        
+        self.cap = None
+        for index in preferred:
+            cap = self._probe_cameras([index]).get(index)
+            if cap is not None:
+                self.camera_index = index
+                self.cap = cap
+                break
+        
+        # 如果优先摄像头都无法打开，并发探测其他可用摄像头
+        if self.cap is None:
+            logger.warning(f"无法打开摄像头 {preferred}，正在查找其他可用摄像头...")
+            candidates = [i for i in self._list_video_devices() if i not in preferred]
+            caps = self._probe_cameras(candidates)
             
-            if available_cameras:
+            if caps:
+                available_cameras = sorted(caps)
                 logger.info(f"找到可用摄像头: {available_cameras}，使用第一个可用的摄像头 {available_cameras[0]}")
                 self.camera_index = available_cameras[0]
-                self.cap = cv2.VideoCapture(self.camera_index)
+                self.cap = caps.pop(self.camera_index)
+                for cap in caps.values():
+                    cap.release()
             else:
-                logger.warning("未找到任何可用的摄像头")
+                logger.warning(f"未找到任何可用的摄像头（耗时 {time.monotonic() - start:.2f}s）")
                 self._enable_fallback_mode()
                 return False
         
+        self._save_cached_camera(self.camera_index)
+        
         if not self.cap.isOpened():
             logger.warning(f"无法打开摄像头 {self.camera_index}")
             self._enable_fallback_mode()
@@ -95,7 +213,7 @@ class CameraCapture:
         # 降低帧率以提高稳定性
         self.cap.set(cv2.CAP_PROP_FPS, 10)
         
-        logger.info(f"摄像头 {self.camera_index} 已启动，分辨率设置为720p，最大帧率10fps")
+        logger.info(f"摄像头 {self.camera_index} 已启动（耗时 {time.monotonic() - start:.2f}s），分辨率设置为720p，最大帧率10fps")
         return True
         
     def _enable_fallback_mode(self):
@@ -143,14 +261,19 @@ class CameraCapture:
         if self.fallback_mode:
             return self.fallback_image.copy()
             
-        if not self.cap or not self.cap.isOpened():
-            logger.warning("摄像头未初始化或已关闭")
-            return None
-            
-        ret, frame = self.cap.read()
-        if not ret:
-            logger.warning("无法读取摄像头帧")
-            return None
+        if self.source is not None:
+            frame = self.source.read()
+            if frame is None:
+                return None
+        else:
+            if not self.cap or not self.cap.isOpened():
+                logger.warning("摄像头未初始化或已关闭")
+                return None
+                
+            ret, frame = self.cap.read()
+            if not ret:
+                logger.warning("无法读取摄像头帧")
+                return None
             
         # 如果启用了预览，显示图像
         if self.show_preview:
@@ -181,8 +304,13 @@ class CameraCapture:
         """
         if self.cap and self.cap.isOpened():
             self.cap.release()
+        if self.source is not None:
+            self.source.close()
             
-        # 关闭所有OpenCV窗口
-        cv2.destroyAllWindows()
+        # 关闭所有OpenCV窗口（无界面环境下的 OpenCV 不支持窗口操作）
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass
         
         logger.info("摄像头已停止捕获")
\ No newline at end of file
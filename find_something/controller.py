@@ -20,7 +20,7 @@ import cv2
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from camera_capture import CameraCapture
-from vision_processor import VisionProcessor
+from vision_processor import VisionProcessor, enhance_image
 from gui_display import GUIDisplay
 from voice_command import VoiceCommandListener
 
@@ -31,15 +31,16 @@ class FindSomethingController:
     FindSomething控制器类，负责协调各个模块的工作流程
     """
     
-    def __init__(self, root=None):
+    def __init__(self, root=None, source=None):
         """
         初始化控制器
         
         Args:
             root: Tkinter主窗口，用于调度GUI更新
+            source (FrameSource, optional): 替代摄像头的帧来源，用于回放录制素材
         """
         self.root = root or tk.Tk()
-        self.camera = CameraCapture()
+        self.camera = CameraCapture(source=source)
         self.vp = VisionProcessor()
         self.gui = GUIDisplay()
         self.voice = VoiceCommandListener()
@@ -51,6 +52,8 @@ class FindSomethingController:
         self.search_lock = threading.Lock()
         self.is_running = False
         self.search_thread = None
+        self.search_stop_event = threading.Event()  # 当前识别线程的停止事件（每次启动新建）
+        self.search_interval = 3.0  # 识别间隔（秒）
         self.current_window = None
         self.camera_available = False
         self.preview_enabled = True  # 添加缺失的属性，启用摄像头预览
@@ -83,11 +86,33 @@ class FindSomethingController:
         self.voice.start_listening()
         
         # 启动自动搜索线程
-        self.search_thread = threading.Thread(target=self._auto_search_loop, daemon=True)
-        self.search_thread.start()
+        self._start_search_loop()
         
         logging.info("应用程序已启动")
         
+    def _start_search_loop(self):
+        """
+        启动自动搜索线程（每个线程使用自己的停止事件，旧线程收到的停止信号不会被新线程清除）
+        """
+        self.search_stop_event = threading.Event()
+        self.search_thread = threading.Thread(target=self._auto_search_loop, args=(self.search_stop_event,),
+                                              daemon=True)
+        self.search_thread.start()
+        
+    def _stop_search_loop(self, wait=False):
+        """
+        停止自动搜索线程（识别间隔中的等待会被立即唤醒）
+        
+        Args:
+            wait (bool): 是否等待线程退出；在Tk主线程中调用时不等待，
+                正在推理的旧线程结束当前这一轮后自行退出，搜索锁保证不会与新线程同时推理
+        """
+        self.search_stop_event.set()
+        if (wait and self.search_thread and
+                threading.current_thread() is not self.search_thread and
+                self.search_thread.is_alive()):
+            self.search_thread.join(timeout=2)
+        
     def stop_application(self):
         """
         停止应用程序
@@ -102,8 +127,7 @@ class FindSomethingController:
         self.camera.stop_capture()
         
         # 等待搜索线程结束
-        if self.search_thread and self.search_thread.is_alive():
-            self.search_thread.join(timeout=2)
+        self._stop_search_loop(wait=True)
         
         # 确保任何UI关闭都在主线程中运行
         self.root.after(0, self._cleanup_ui)
@@ -112,19 +136,19 @@ class FindSomethingController:
         self.gui.close_all()
         logger.info("应用已停止")
         
-    def _auto_search_loop(self):
+    def _auto_search_loop(self, stop_event):
         """
         自动搜索循环
         """
         logger.info("识别循环开始")
-        while self.is_running:
+        while self.is_running and not stop_event.is_set():
             # 先加简单去重锁，避免并发搜索
             if not self.search_lock.acquire(False):
-                time.sleep(0.05)
+                stop_event.wait(0.05)
                 continue
             try:
                 if not self.camera_available:
-                    time.sleep(0.05)
+                    stop_event.wait(0.05)
                     continue
                     
                 # 暂时关闭预览以避免干扰截图
@@ -137,7 +161,7 @@ class FindSomethingController:
                 self.camera.toggle_preview(preview_state)
                 
                 if frame is None:
-                    time.sleep(0.05)
+                    stop_event.wait(0.05)
                     continue
                     
                 # 图像增强：亮度与对比度调节
@@ -151,14 +175,17 @@ class FindSomethingController:
                     name = result  # result现在是字符串而不是字典
                     now = time.time()
                     # 检查是否满足显示条件（不是同一商品或距离上次显示时间足够长）
+                    if stop_event.is_set():
+                        # 识别期间会话已被重置，丢弃这一轮的结果
+                        continue
                     if name != self.last_shown or (now - self.last_shown_time) > self.min_display_interval:
                         self.last_shown = name
                         self.last_shown_time = now
                         # 在主线程创建弹窗
                         self.root.after(0, lambda n=name, s=score: self._show_product(n, s))
                         
-                # 控制识别频率，每3秒识别一次
-                time.sleep(3.0)
+                # 控制识别频率，每3秒识别一次（停止时立即唤醒）
+                stop_event.wait(self.search_interval)
             except Exception as e:
                 logger.error(f"搜索过程中发生错误: {e}", exc_info=True)
             finally:
@@ -169,7 +196,7 @@ class FindSomethingController:
         """
         图像增强：调整亮度和对比度
         """
-        return cv2.convertScaleAbs(img, alpha=1.2, beta=15)
+        return enhance_image(img)
         
     def _update_detection_buffers(self, result, score, frame):
         """
@@ -237,6 +264,18 @@ class FindSomethingController:
         self.detection_buffer.clear()
         self.confidence_buffer.clear()
         self.embedding_buffer.clear()
+        
+    def _reset_session_state(self):
+        """
+        重置会话状态（识别缓冲区、已显示商品、识别历史），保留已加载的模型、索引和摄像头
+        """
+        self._reset_detection_state()
+        self.last_shown = None
+        self.last_shown_time = 0
+        self.stable_detection_count = 0
+        self.is_detecting_stable = False
+        self.current_window = None
+        self.vp.reset_history()
             
     def _on_voice_command(self, text):
         """
@@ -295,11 +334,17 @@ class FindSomethingController:
         self.root.after(0, self._cleanup_and_restart)
     
     def _cleanup_and_restart(self):
-        """在主线程中清理并重启应用"""
-        self.stop_application()
-        # 重新初始化应用状态
-        self.__init__(self.root)
-        self.start_application()
+        """
+        在主线程中热重启：只清理会话状态和窗口，
+        保留已加载的商品索引、VLM处理器、摄像头句柄和语音监听
+        """
+        start = time.perf_counter()
+        self._stop_search_loop()
+        self.gui.close_all()
+        self._reset_session_state()
+        if self.is_running:
+            self._start_search_loop()
+        logger.info(f"已返回主页面，会话重置耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
     
     def _show_product(self, product_name, score):
         """显示产品信息"""
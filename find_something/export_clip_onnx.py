@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+导出 CLIP ViT-B-32 图像编码器为 ONNX 模型
+与 DuoMotai 的 ImageRetrieval 使用同一份 open_clip 权重，导出后由 VLMHandler 通过 ONNX Runtime 在CPU上推理
+
+用法:
+    python3 find_something/export_clip_onnx.py [--weights 权重路径] [--output 输出路径] [--quantize]
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vlm_handler import ONNX_MODEL_PATH, CLIP_IMAGE_SIZE
+
+logger = logging.getLogger("export_clip_onnx")
+
+# 与 DuoMotai/fin.py 中 ImageRetrieval 使用的权重一致
+OPEN_CLIP_WEIGHTS = "/mnt/data/open_clip_weights/open_clip_model.safetensors"
+
+
+def export(weights, output, opset=17):
+    """
+    导出图像编码器，batch 维度为动态维度
+    """
+    import torch
+    import open_clip
+
+    outputs = open_clip.create_model_and_transforms("ViT-B-32", pretrained=weights, device="cpu")
+    model = outputs[0]
+    model.eval()
+
+    class ImageEncoder(torch.nn.Module):
+        def __init__(self, clip_model):
+            super().__init__()
+            self.clip_model = clip_model
+
+        def forward(self, pixel_values):
+            return self.clip_model.encode_image(pixel_values)
+
+    dummy = torch.zeros(2, 3, CLIP_IMAGE_SIZE, CLIP_IMAGE_SIZE)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            ImageEncoder(model),
+            dummy,
+            output,
+            input_names=["pixel_values"],
+            output_names=["image_embeds"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+            opset_version=opset,
+        )
+        reference = model.encode_image(dummy).numpy()
+    logger.info(f"ONNX模型已导出: {output}")
+    return reference, dummy.numpy()
+
+
+def quantize(path):
+    """
+    动态 INT8 量化，进一步降低CPU推理延迟
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantized = path.replace(".onnx", ".int8.onnx")
+    quantize_dynamic(path, quantized, weight_type=QuantType.QInt8)
+    logger.info(f"INT8量化模型已导出: {quantized}")
+    return quantized
+
+
+def verify(path, reference, inputs):
+    """
+    用 ONNX Runtime 推理并与 PyTorch 输出对比
+    """
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+    result = session.run(None, {session.get_inputs()[0].name: inputs})[0]
+    max_diff = float(np.max(np.abs(result - reference)))
+    logger.info(f"ONNX Runtime 与 PyTorch 输出最大误差: {max_diff:.6f}")
+    return max_diff
+
+
+def main():
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="导出 CLIP ViT-B-32 图像编码器为 ONNX")
+    parser.add_argument("--weights", default=OPEN_CLIP_WEIGHTS, help="open_clip 权重路径")
+    parser.add_argument("--output", default=ONNX_MODEL_PATH, help="ONNX 输出路径")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset 版本")
+    parser.add_argument("--quantize", action="store_true", help="额外导出动态INT8量化模型")
+    args = parser.parse_args()
+
+    reference, inputs = export(args.weights, args.output, args.opset)
+    verify(args.output, reference, inputs)
+    if args.quantize:
+        quantized = quantize(args.output)
+        verify(quantized, reference, inputs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+帧来源模块
+为 CameraCapture 提供可替换的帧来源：视频文件、图片目录或合成画面，
+用于在没有物理摄像头的情况下回放录制素材、做基准测试和回归测试
+"""
+
+import logging
+import os
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger("frame_source")
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    """
+    帧来源基类
+
+    Attributes:
+        fps (float): 素材帧率，用于按真实速度回放和换算时间
+        label (str): 素材标签（默认取文件名），基准测试中作为期望识别出的商品
+    """
+
+    def __init__(self, fps=10.0, label=None):
+        self.fps = fps
+        self.label = label
+
+    def read(self):
+        """
+        读取下一帧
+
+        Returns:
+            numpy.ndarray: 图像帧，素材读完时返回None
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        释放资源
+        """
+        pass
+
+
+class VideoFileSource(FrameSource):
+    """
+    从视频文件读取帧
+    """
+
+    def __init__(self, path, loop=False, label=None):
+        self.path = str(path)
+        self.loop = loop
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            raise IOError(f"无法打开视频文件: {self.path}")
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 10.0
+        super().__init__(fps=fps, label=label or Path(self.path).stem)
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def close(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """
+    按文件名顺序读取目录中的图片作为帧序列
+    """
+
+    def __init__(self, directory, fps=10.0, loop=False, label=None):
+        self.directory = Path(directory)
+        self.files = sorted(f for f in self.directory.iterdir() if f.suffix.lower() in IMAGE_SUFFIXES)
+        if not self.files:
+            raise IOError(f"目录中没有图片: {self.directory}")
+        self.loop = loop
+        self.position = 0
+        super().__init__(fps=fps, label=label or self.directory.name)
+
+    def read(self):
+        while self.position < len(self.files) or self.loop:
+            if self.position >= len(self.files):
+                self.position = 0
+            path = self.files[self.position]
+            self.position += 1
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                return frame
+            logger.warning(f"无法读取图像: {path}")
+        return None
+
+
+class SyntheticSource(FrameSource):
+    """
+    合成画面：静态背景上叠加一张（可选的）商品图片，并加入轻微抖动和噪声，模拟顾客站在摄像头前
+    """
+
+    def __init__(self, image=None, num_frames=100, width=1280, height=720, fps=10.0, seed=0, label=None):
+        self.num_frames = num_frames
+        self.width = width
+        self.height = height
+        self.position = 0
+        self.rng = np.random.default_rng(seed)
+        self.background = np.full((height, width, 3), 90, dtype=np.uint8)
+        self.background[:, :width // 2] = (60, 110, 60)
+        self.item = None
+        if image is not None:
+            item = cv2.imread(str(image))
+            if item is None:
+                raise IOError(f"无法读取图像: {image}")
+            item_h = height // 2
+            item_w = max(1, int(item.shape[1] * item_h / item.shape[0]))
+            self.item = cv2.resize(item, (item_w, item_h))
+            label = label or Path(image).stem
+        super().__init__(fps=fps, label=label)
+
+    def read(self):
+        if self.position >= self.num_frames:
+            return None
+        frame = self.background.copy()
+        # 前 1 秒只有背景，之后商品进入画面
+        if self.item is not None and self.position >= self.fps:
+            item_h, item_w = self.item.shape[:2]
+            dx, dy = self.rng.integers(-10, 11, size=2)
+            x = int(np.clip((self.width - item_w) // 2 + dx, 0, self.width - item_w))
+            y = int(np.clip((self.height - item_h) // 2 + dy, 0, self.height - item_h))
+            frame[y:y + item_h, x:x + item_w] = self.item
+        noise = self.rng.integers(-4, 5, size=frame.shape, dtype=np.int16)
+        self.position += 1
+        return np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def create_frame_source(spec, fps=10.0, loop=False):
+    """
+    根据描述创建帧来源
+
+    Args:
+        spec (str): 视频文件路径、图片目录路径，或 "synthetic" / "synthetic:<商品图片路径>"
+        fps (float): 图片目录和合成画面使用的帧率
+        loop (bool): 读完后是否从头循环
+
+    Returns:
+        FrameSource: 帧来源对象
+    """
+    spec = str(spec)
+    if spec == "synthetic" or spec.startswith("synthetic:"):
+        image = spec.split(":", 1)[1] if ":" in spec else None
+        return SyntheticSource(image=image or None, fps=fps)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, fps=fps, loop=loop)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, loop=loop)
+    raise ValueError(f"无法识别的帧来源: {spec}")
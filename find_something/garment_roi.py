@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+衣物感兴趣区域（ROI）检测模块
+在提取特征之前，用背景减除在CPU上快速定位画面中的衣物/人物区域并裁剪，
+避免把大量背景像素送入embedding模型
+"""
+
+import logging
+import cv2
+import numpy as np
+
+logger = logging.getLogger("garment_roi")
+
+
+class GarmentROIDetector:
+    """
+    基于背景减除（MOG2）的轻量级衣物区域检测器
+
+    背景模型在前 warmup_frames 帧内正常学习，之后只以很小的学习率缓慢更新，
+    顾客拿着衣物静止不动时不会很快被吸收进背景；前景暂时为空时沿用上一次的区域
+    """
+
+    def __init__(self, max_rois=3, min_area_ratio=0.03, max_area_ratio=0.9,
+                 padding=0.1, work_width=320, history=200, var_threshold=32,
+                 warmup_frames=10, learning_rate=0.0002, hold_frames=5):
+        """
+        初始化ROI检测器
+
+        Args:
+            max_rois (int): 每帧最多返回的区域数量（支持画面中有多件衣物）
+            min_area_ratio (float): 区域面积占整帧的最小比例，过小的视为噪声
+            max_area_ratio (float): 区域面积占整帧的最大比例，过大说明背景模型尚未稳定
+            padding (float): 裁剪框向外扩展的比例
+            work_width (int): 背景减除时缩放到的宽度，越小越快
+            history (int): 背景模型的历史帧数
+            var_threshold (float): MOG2 前景判定阈值
+            warmup_frames (int): 背景建模阶段的帧数，期间按默认学习率学习
+            learning_rate (float): 建模完成后的学习率（0 表示冻结背景模型）
+            hold_frames (int): 前景为空时沿用上一次区域的最多帧数
+        """
+        self.max_rois = max_rois
+        self.min_area_ratio = min_area_ratio
+        self.max_area_ratio = max_area_ratio
+        self.padding = padding
+        self.work_width = work_width
+        self.warmup_frames = warmup_frames
+        self.learning_rate = learning_rate
+        self.hold_frames = hold_frames
+        self.frame_count = 0
+        self.last_rois = []
+        self.missed_frames = 0
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=history, varThreshold=var_threshold, detectShadows=False
+        )
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+
+    def detect(self, frame):
+        """
+        检测当前帧中的衣物区域
+
+        Args:
+            frame: OpenCV图像（BGR）
+
+        Returns:
+            list: 原图坐标系下的 (x, y, w, h) 列表，按面积从大到小排列；未检测到时返回空列表
+        """
+        if frame is None:
+            return []
+
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.work_width / float(width))
+        small = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+        learning_rate = -1 if self.frame_count < self.warmup_frames else self.learning_rate
+        self.frame_count += 1
+        mask = self.subtractor.apply(small, learningRate=learning_rate)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, self.kernel)
+        # 膨胀以把同一件衣物上断开的前景块连成一片
+        mask = cv2.dilate(mask, self.kernel, iterations=3)
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        frame_area = float(small.shape[0] * small.shape[1])
+
+        boxes = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            area_ratio = (w * h) / frame_area
+            if self.min_area_ratio <= area_ratio <= self.max_area_ratio:
+                boxes.append((x, y, w, h))
+        boxes.sort(key=lambda b: b[2] * b[3], reverse=True)
+
+        rois = []
+        for x, y, w, h in boxes[:self.max_rois]:
+            pad_w, pad_h = int(w * self.padding), int(h * self.padding)
+            x0 = max(0, int((x - pad_w) / scale))
+            y0 = max(0, int((y - pad_h) / scale))
+            x1 = min(width, int((x + w + pad_w) / scale))
+            y1 = min(height, int((y + h + pad_h) / scale))
+            rois.append((x0, y0, x1 - x0, y1 - y0))
+
+        if rois:
+            self.last_rois = rois
+            self.missed_frames = 0
+        elif self.last_rois and self.missed_frames < self.hold_frames:
+            # 前景暂时为空（例如衣物静止后部分被背景吸收），沿用上一次的区域，避免在裁剪和整帧之间来回切换
+            self.missed_frames += 1
+            return list(self.last_rois)
+        else:
+            self.last_rois = []
+        return rois
+
+    def crop(self, frame):
+        """
+        裁剪当前帧中的衣物区域
+
+        Args:
+            frame: OpenCV图像（BGR）
+
+        Returns:
+            list: 裁剪后的图像列表；未检测到衣物时返回只包含整帧的列表
+        """
+        rois = self.detect(frame)
+        if not rois:
+            return [frame]
+        logger.debug(f"检测到 {len(rois)} 个衣物区域: {rois}")
+        return [frame[y:y + h, x:x + w] for x, y, w, h in rois]
+
+    def reset(self):
+        """
+        重置背景模型（例如摄像头位置变化后）
+        """
+        history = self.subtractor.getHistory()
+        var_threshold = self.subtractor.getVarThreshold()
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=history, varThreshold=var_threshold, detectShadows=False
+        )
+        self.frame_count = 0
+        self.last_rois = []
+        self.missed_frames = 0
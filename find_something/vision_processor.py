@@ -19,7 +19,8 @@ from collections import deque
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from vlm_handler import VLMHandler
+from vlm_handler import VLMHandler, ONNX_MODEL_PATH, ONNX_INTRA_OP_THREADS
+from garment_roi import GarmentROIDetector
 
 logger = logging.getLogger("vision_processor")
 
@@ -27,14 +28,42 @@ logger = logging.getLogger("vision_processor")
 PRODUCT_DIR = os.path.join("DuoMotai", "data", "product_images")
 PRODUCT_SPECS_DIR = os.path.join("DuoMotai", "data", "product_specs")
 
+# VLM embedding维度
+EMBEDDING_DIM = 512
+
+# 级联检索配置：先用颜色直方图粗筛出 top-K 商品，再只对候选商品做 embedding 精排
+CASCADE_ENABLED = True
+CASCADE_TOPK = 5
+# 每隔多少帧做一次全量比对，用于统计粗筛召回率（0 表示不统计）
+CASCADE_AUDIT_INTERVAL = 20
+
+# 衣物区域裁剪：提取特征前先定位衣物区域，只对裁剪后的区域计算embedding
+ROI_ENABLED = True
+ROI_MAX_REGIONS = 3
+
+def enhance_image(img):
+    """
+    图像增强：调整亮度和对比度（识别前的统一预处理）
+    """
+    return cv2.convertScaleAbs(img, alpha=1.2, beta=15)
+
 class VisionProcessor:
-    def __init__(self, device=None):
+    def __init__(self, device=None, cascade=CASCADE_ENABLED, cascade_topk=CASCADE_TOPK,
+                 cascade_audit_interval=CASCADE_AUDIT_INTERVAL, roi=ROI_ENABLED,
+                 onnx_path=ONNX_MODEL_PATH, num_threads=ONNX_INTRA_OP_THREADS):
         self.device = device or "cpu"
         logger.info(f"[VisionProcessor] device={self.device}")
         
-        # 初始化VLM处理器，强制使用模拟模式
-        self.vlm_handler = VLMHandler(simulate=True)
-        logger.info("[VisionProcessor] 使用VLM模型（模拟模式）")
+        # 初始化VLM处理器：ONNX图像编码器可用时使用CPU推理，否则回退到模拟模式
+        self.vlm_handler = VLMHandler(onnx_path=onnx_path, num_threads=num_threads)
+        if self.vlm_handler.simulate_mode:
+            logger.info("[VisionProcessor] 使用VLM模型（模拟模式）")
+        else:
+            logger.info(f"[VisionProcessor] 使用ONNX图像编码器: {onnx_path}")
+        # 没有可用的图像编码器时只用颜色直方图排序，不在每一帧上报错
+        self.use_embeddings = self.vlm_handler.has_embedding_backend
+        if not self.use_embeddings:
+            logger.warning("[VisionProcessor] 没有可用的图像编码器，改用颜色直方图相似度识别")
         
         # 控制识别频率
         self.last_recognition_time = 0
@@ -51,9 +80,21 @@ class VisionProcessor:
         # 记录上一个已确认的商品，避免重复输出
         self.last_product = None
         
+        # 级联检索：粗筛（颜色直方图）+ 精排（embedding）
+        self.cascade_enabled = cascade
+        self.cascade_topk = max(1, int(cascade_topk))
+        self.cascade_audit_interval = int(cascade_audit_interval)
+        self.last_timings = {}
+        self.reset_cascade_stats()
+        
+        # 衣物区域检测器（None 表示直接使用整帧）
+        self.roi_detector = GarmentROIDetector(max_rois=ROI_MAX_REGIONS) if roi else None
+        
         # 构建商品嵌入索引库
         self.product_files = []
         self.prod_embeddings = None
+        self.prod_histograms = None
+        self._embedded = None  # 标记哪些商品已经计算过embedding（级联模式下按需计算）
         self.names = []
         self._build_index()
 
@@ -68,7 +109,31 @@ class VisionProcessor:
         except Exception as e:
             logger.error(f"获取图像embedding时出错: {e}")
             # 出错时返回零向量
-            return np.zeros(512)
+            return np.zeros(EMBEDDING_DIM)
+
+    def _imgs_to_embeddings(self, imgs):
+        """
+        批量获取多张图像的embedding，一次调用完成
+        """
+        try:
+            return self.vlm_handler.get_image_embeddings(imgs)
+        except Exception as e:
+            logger.error(f"批量获取图像embedding时出错: {e}")
+            return np.zeros((len(imgs), EMBEDDING_DIM))
+
+    def _img_to_histogram(self, img_bgr):
+        """
+        计算廉价的颜色直方图特征，用于级联检索的粗筛阶段
+        
+        使用 HSV 三维直方图并开平方归一化，两个特征的点积即为 Bhattacharyya 系数
+        """
+        small = cv2.resize(img_bgr, (64, 64), interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1, 2], None, [16, 4, 4], [0, 180, 0, 256, 0, 256]).flatten()
+        total = hist.sum()
+        if total > 0:
+            hist = np.sqrt(hist / total)
+        return hist.astype(np.float32)
 
     def _build_index(self):
         project_root = Path(__file__).parent.parent
@@ -76,10 +141,13 @@ class VisionProcessor:
         
         if not product_dir.exists():
             logger.warning(f"商品图片目录不存在: {product_dir}")
-            self.prod_embeddings = np.zeros((0, 512))  # VLM embedding维度
+            self.prod_embeddings = np.zeros((0, EMBEDDING_DIM))
+            self.prod_histograms = np.zeros((0, 256), dtype=np.float32)
+            self._embedded = np.zeros(0, dtype=bool)
             return
             
         files = [f for f in product_dir.iterdir() if f.suffix.lower() in [".jpg", ".png"]]
+        histograms = []
         embeddings = []
         
         for file_path in files:
@@ -90,19 +158,185 @@ class VisionProcessor:
                     logger.warning(f"无法读取图像: {file_path}")
                     continue
                     
-                emb = self._img_to_embedding(img)
-                embeddings.append(emb)
+                histograms.append(self._img_to_histogram(img))
+                # 级联模式下商品embedding在首次进入候选集时才计算
+                if not self.cascade_enabled and self.use_embeddings:
+                    embeddings.append(self._img_to_embedding(img))
                 self.names.append(file_path.stem)  # 文件名（不含扩展名）
                 self.product_files.append(str(file_path))
             except Exception as e:
                 logger.warning(f"处理图像时出错 {file_path}: {e}")
                 
+        count = len(self.names)
+        if histograms:
+            self.prod_histograms = np.vstack(histograms)
+        else:
+            self.prod_histograms = np.zeros((0, 256), dtype=np.float32)
         if embeddings:
             self.prod_embeddings = np.vstack(embeddings)
+            self._embedded = np.ones(count, dtype=bool)
         else:
-            self.prod_embeddings = np.zeros((0, 512))  # VLM embedding维度
+            self.prod_embeddings = np.zeros((count, EMBEDDING_DIM))
+            self._embedded = np.zeros(count, dtype=bool)
             
-        logger.info(f"[VisionProcessor] 已索引 {len(self.product_files)} 个商品图像")
+        logger.info(f"[VisionProcessor] 已索引 {len(self.product_files)} 个商品图像"
+                    f"（级联检索: {'开启, top-K=' + str(self.cascade_topk) if self.cascade_enabled else '关闭'}）")
+
+    def _ensure_product_embeddings(self, indices):
+        """
+        确保候选商品的embedding已计算（级联模式下按需计算并缓存）
+        """
+        missing = [idx for idx in indices if not self._embedded[idx]]
+        if not missing:
+            return
+        # 一次批量调用，ONNX后端可以充分利用batch推理
+        self.prod_embeddings[missing] = self._imgs_to_embeddings([self.product_files[idx] for idx in missing])
+        self._embedded[missing] = True
+
+    def _cosine_scores(self, emb, indices):
+        """
+        计算帧embedding与指定商品embedding的余弦相似度
+        """
+        # 注意：由于我们现在使用的是改进的模拟embedding，需要确保向量已归一化
+        emb_norm = np.linalg.norm(emb)
+        if emb_norm > 0:
+            emb = emb / emb_norm
+            
+        candidates = self.prod_embeddings[indices]
+        prod_norms = np.linalg.norm(candidates, axis=1)
+        # 避免除零错误
+        prod_norms[prod_norms == 0] = 1
+        
+        return np.dot(candidates, emb) / prod_norms
+
+    def _rank_products(self, frame):
+        """
+        对当前帧进行级联检索，返回按相似度降序排列的 (商品索引, 相似度)
+        
+        先裁剪出衣物区域；粗筛阶段用颜色直方图为每个区域选出 top-K 候选，
+        精排阶段把所有区域批量送入embedding模型，只与候选商品计算相似度，
+        单帧开销随 K 而不是商品库规模增长。多个区域命中同一商品时取最高分。
+        """
+        count = len(self.names)
+        t0 = time.perf_counter()
+        crops = self.roi_detector.crop(frame) if self.roi_detector else [frame]
+        t1 = time.perf_counter()
+        
+        if not self.use_embeddings:
+            return self._rank_by_histogram(crops, t0, t1)
+        
+        use_cascade = self.cascade_enabled and count > self.cascade_topk
+        if use_cascade:
+            crop_candidates = []
+            for crop in crops:
+                hist_sims = self.prod_histograms @ self._img_to_histogram(crop)
+                crop_candidates.append(np.argpartition(-hist_sims, self.cascade_topk - 1)[:self.cascade_topk])
+            candidates = np.unique(np.concatenate(crop_candidates))
+        else:
+            candidates = np.arange(count)
+            crop_candidates = [candidates] * len(crops)
+        t2 = time.perf_counter()
+        
+        self._ensure_product_embeddings(candidates)
+        embs = self._imgs_to_embeddings(crops)
+        t3 = time.perf_counter()
+        
+        # 合并各区域的得分：同一商品取所有区域中的最高相似度
+        best = {}
+        for emb, crop_idx in zip(embs, crop_candidates):
+            for idx, sim in zip(crop_idx, self._cosine_scores(emb, crop_idx)):
+                if sim > best.get(idx, -np.inf):
+                    best[idx] = sim
+        indices = np.fromiter(best.keys(), dtype=int, count=len(best))
+        sims = np.fromiter(best.values(), dtype=float, count=len(best))
+        order = np.argsort(sims)[::-1]
+        t4 = time.perf_counter()
+        
+        self.last_timings = {
+            "roi": (t1 - t0) * 1000,
+            "prefilter": (t2 - t1) * 1000,
+            "embed": (t3 - t2) * 1000,
+            "rerank": (t4 - t3) * 1000,
+        }
+        stats = self.cascade_stats
+        stats["frames"] += 1
+        stats["regions"] += len(crops)
+        stats["candidates"] += len(candidates)
+        for stage, ms in self.last_timings.items():
+            stats[f"{stage}_ms"] += ms
+        
+        # 定期做一次全量比对，统计粗筛阶段的召回率
+        if (use_cascade and self.cascade_audit_interval > 0
+                and stats["frames"] % self.cascade_audit_interval == 0):
+            all_indices = np.arange(count)
+            self._ensure_product_embeddings(all_indices)
+            full_sims = np.max([self._cosine_scores(emb, all_indices) for emb in embs], axis=0)
+            best_full = int(np.argmax(full_sims))
+            stats["audited"] += 1
+            if best_full in candidates:
+                stats["audit_hits"] += 1
+            else:
+                logger.debug(f"[VisionProcessor] 粗筛漏召回: {self.names[best_full]}")
+        
+        return indices[order], sims[order]
+
+    def _rank_by_histogram(self, crops, t0, t1):
+        """
+        没有图像编码器时的排序：各区域与商品的颜色直方图相似度，同一商品取最高分
+        """
+        if len(self.names):
+            sims = np.max([self.prod_histograms @ self._img_to_histogram(crop) for crop in crops], axis=0)
+        else:
+            sims = np.zeros(0, dtype=np.float32)
+        order = np.argsort(sims)[::-1]
+        t2 = time.perf_counter()
+        
+        self.last_timings = {"roi": (t1 - t0) * 1000, "prefilter": (t2 - t1) * 1000,
+                             "embed": 0.0, "rerank": 0.0}
+        stats = self.cascade_stats
+        stats["frames"] += 1
+        stats["regions"] += len(crops)
+        stats["candidates"] += len(sims)
+        for stage, ms in self.last_timings.items():
+            stats[f"{stage}_ms"] += ms
+        return order, sims[order].astype(float)
+
+    def reset_cascade_stats(self):
+        """
+        重置级联检索的统计数据
+        """
+        self.cascade_stats = {
+            "frames": 0,
+            "regions": 0,
+            "candidates": 0,
+            "roi_ms": 0.0,
+            "prefilter_ms": 0.0,
+            "embed_ms": 0.0,
+            "rerank_ms": 0.0,
+            "audited": 0,
+            "audit_hits": 0,
+        }
+
+    def get_cascade_stats(self):
+        """
+        获取级联检索的统计信息
+        
+        Returns:
+            dict: 各阶段平均耗时（毫秒）、平均区域数、平均候选数以及粗筛召回率
+        """
+        stats = self.cascade_stats
+        frames = max(stats["frames"], 1)
+        return {
+            "frames": stats["frames"],
+            "avg_regions": stats["regions"] / frames,
+            "avg_candidates": stats["candidates"] / frames,
+            "avg_roi_ms": stats["roi_ms"] / frames,
+            "avg_prefilter_ms": stats["prefilter_ms"] / frames,
+            "avg_embed_ms": stats["embed_ms"] / frames,
+            "avg_rerank_ms": stats["rerank_ms"] / frames,
+            "audited": stats["audited"],
+            "recall": stats["audit_hits"] / stats["audited"] if stats["audited"] else None,
+        }
         
     def get_product_info(self, product_name):
         """
@@ -162,27 +396,15 @@ class VisionProcessor:
         if self.prod_embeddings.shape[0] == 0 or frame is None:
             return None, 0.0
             
-        emb = self.frame_to_embedding(frame)
+        # 级联检索，结果已按相似度降序排列
+        ranked_indices, ranked_sims = self._rank_products(frame)
         
-        # 计算余弦相似度
-        # 注意：由于我们现在使用的是改进的模拟embedding，需要确保向量已归一化
-        emb_norm = np.linalg.norm(emb)
-        if emb_norm > 0:
-            emb = emb / emb_norm
-            
-        prod_norms = np.linalg.norm(self.prod_embeddings, axis=1)
-        # 避免除零错误
-        prod_norms[prod_norms == 0] = 1
-        
-        # 计算余弦相似度
-        sims = np.dot(self.prod_embeddings, emb) / prod_norms
-        
-        if len(sims) == 0:
+        if len(ranked_sims) == 0:
             return None, 0.0
             
         # 获取top-k最相似的结果
-        top_indices = np.argsort(sims)[::-1][:topk]
-        top_scores = sims[top_indices]
+        top_indices = ranked_indices[:topk]
+        top_scores = ranked_sims[:topk]
         
         idx = top_indices[0]
         score = float(top_scores[0])
@@ -196,6 +418,14 @@ class VisionProcessor:
         logger.info(f"最佳匹配: {result['name']} (相似度: {score:.3f})")
         return result['name'], score
     
+    def reset_history(self):
+        """
+        清除识别历史（连续帧确认队列和上一个已确认的商品），保留商品索引
+        """
+        self.recognition_history.clear()
+        self.recent_results.clear()
+        self.last_product = None
+
     def check_consecutive_match(self):
         """
         检查最近 N 帧是否连续识别到同一商品
@@ -225,28 +455,16 @@ class VisionProcessor:
         if self.prod_embeddings.shape[0] == 0 or frame is None:
             return None, 0.0
             
-        emb = self.frame_to_embedding(frame)
-        
-        # 计算余弦相似度
-        # 注意：由于我们现在使用的是改进的模拟embedding，需要确保向量已归一化
-        emb_norm = np.linalg.norm(emb)
-        if emb_norm > 0:
-            emb = emb / emb_norm
-            
-        prod_norms = np.linalg.norm(self.prod_embeddings, axis=1)
-        # 避免除零错误
-        prod_norms[prod_norms == 0] = 1
-        
-        # 计算余弦相似度
-        sims = np.dot(self.prod_embeddings, emb) / prod_norms
+        # 级联检索，结果已按相似度降序排列
+        ranked_indices, ranked_sims = self._rank_products(frame)
         
-        if len(sims) == 0:
+        if len(ranked_sims) == 0:
             self.recent_results.append(None)
             return self.check_consecutive_match()
             
         # 获取最佳匹配
-        best_idx = np.argmax(sims)
-        best_score = float(sims[best_idx])
+        best_idx = ranked_indices[0]
+        best_score = float(ranked_sims[0])
         best_product = self.names[best_idx]
         
         logger.info(f"当前帧匹配: {best_product} (相似度: {best_score:.3f})")
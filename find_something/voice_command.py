@@ -3,37 +3,186 @@
 
 """
 语音命令监听模块（ASR）
+麦克风音频写入环形缓冲区，经 VAD 门控后送入 sherpa-onnx 关键词检测模型，
+只识别控制器处理的固定命令词（"我不要了"、"关闭"、"返回主页面" 等）。
+监听线程只占用 1 个推理线程并降低调度优先级，不会挤占摄像头识别的 CPU。
 """
 
+import os
+import sys
 import threading
 import time
 import logging
+from collections import deque
+
+import numpy as np
+
+# 与 DuoMotai 共用录音环形缓冲区、VAD 和关键词检测模块
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DuoMotai"))
+from modules.asr.ring_buffer import AudioRingBuffer
+from modules.asr.vad_segmenter import VADSegmenter
+from modules.asr.keyword_spotter import CommandSpotter, DEFAULT_KWS_MODEL_DIR
 
 logger = logging.getLogger("voice")
 
+# 关键词检测模型目录（与 DuoMotai/fin.py 使用同一个模型）
+KWS_MODEL_DIR = DEFAULT_KWS_MODEL_DIR
+# 控制器 _on_voice_command 能处理的命令词
+COMMANDS = ["我不要了", "关闭", "取消", "停止", "退出", "返回主页面", "返回主页"]
+
+SAMPLE_RATE = 16000
+BLOCK_MS = 100                # 录音回调块长
+RING_SECONDS = 2.0            # 环形缓冲区容量（秒）
+MAX_BACKLOG_SECONDS = 1.0     # 监听线程落后超过该时长时跳过旧音频，只处理最近的部分
+VAD_FRAME_MS = 20             # VAD 帧长
+VAD_HANGOVER_MS = 600         # 语音结束后继续送入模型的时长
+VAD_PRE_ROLL_MS = 300         # 门控打开时补送的历史音频，避免吞掉首字
+VAD_ENERGY_THRESHOLD = 0.01   # 未安装 webrtcvad 时的能量阈值
+
+# CPU 预算：关键词检测只用 1 个推理线程，监听线程降低优先级（nice 值越大优先级越低）
+KWS_NUM_THREADS = 1
+LISTENER_NICENESS = 10
+
+
 class VoiceCommandListener:
-    def __init__(self):
+    def __init__(self, model_dir=KWS_MODEL_DIR, commands=None, num_threads=KWS_NUM_THREADS,
+                 niceness=LISTENER_NICENESS):
+        """
+        初始化语音命令监听器
+
+        Args:
+            model_dir (str): 关键词检测模型目录
+            commands (list): 需要识别的命令词，默认为控制器处理的命令
+            num_threads (int): 关键词检测推理线程数
+            niceness (int): 监听线程的 nice 值，0 表示不调整
+        """
         self.command_callback = None
         self._stop_event = threading.Event()
         self.listen_thread = None
+        self.model_dir = model_dir
+        self.commands = list(commands or COMMANDS)
+        self.num_threads = num_threads
+        self.niceness = niceness
+        self.spotter = None
+        self.last_latency_ms = None  # 最近一次命令的识别延迟（命中帧所在录音块的采集时间到回调）
 
     def set_command_callback(self, callback):
         self.command_callback = callback
 
+    # ============================================================
+    # 模型与 VAD
+    # ============================================================
+    def _load_spotter(self):
+        """
+        加载关键词检测模型，失败时返回 False（只能通过 simulate_command 触发命令）
+        """
+        if self.spotter is not None:
+            return True
+        try:
+            self.spotter = CommandSpotter(self.model_dir, {command: command for command in self.commands},
+                                          sample_rate=SAMPLE_RATE, num_threads=self.num_threads)
+            logger.info(f"关键词检测模型加载完成: {self.model_dir}（{len(self.commands)} 个命令词）")
+            return True
+        except Exception as e:
+            logger.warning(f"关键词检测模型不可用，语音命令仅支持模拟输入: {e}")
+            return False
+
+    def _lower_priority(self):
+        """
+        降低当前（监听）线程的调度优先级；Linux 下 nice 值按线程生效
+        """
+        if not self.niceness:
+            return
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.niceness)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"无法调整语音线程优先级: {e}")
+
+    # ============================================================
+    # 监听循环
+    # ============================================================
     def _listen_loop(self):
-        # 这里用真实 ASR 或模拟 input() ，示例用模拟
-        while not self._stop_event.is_set():
-            # replace with real ASR streaming read
-            try:
-                # 模拟语音命令输入
-                # 在实际应用中，这里应该替换为真实的ASR识别逻辑
-                time.sleep(1)  # 避免过于频繁的检查
-            except Exception:
-                continue
-                
+        self._lower_priority()
+        if not self._load_spotter():
+            self._stop_event.wait()
+            logger.info("语音线程退出")
+            return
+
+        try:
+            import sounddevice as sd
+        except ImportError as e:
+            logger.warning(f"sounddevice 不可用，语音命令仅支持模拟输入: {e}")
+            self._stop_event.wait()
+            logger.info("语音线程退出")
+            return
+
+        ring = AudioRingBuffer(SAMPLE_RATE * RING_SECONDS)
+        # 每个录音块的 (结束位置, 采集时间)，用于计算命令的真实延迟
+        capture_times = deque()
+        vad = VADSegmenter(sample_rate=SAMPLE_RATE, frame_ms=VAD_FRAME_MS, energy_threshold=VAD_ENERGY_THRESHOLD)
+        frame_size = vad.frame_size
+        max_backlog = int(SAMPLE_RATE * MAX_BACKLOG_SECONDS)
+        hangover_frames = VAD_HANGOVER_MS // VAD_FRAME_MS
+        pre_roll = deque(maxlen=VAD_PRE_ROLL_MS // VAD_FRAME_MS)
+        silence_frames = hangover_frames  # 门控初始为关闭
+
+        def audio_callback(indata, frames, time_info, status):
+            captured_at = time.perf_counter()
+            ring.write(indata[:, 0])
+            capture_times.append((ring.write_position, captured_at))
+
+        def capture_time(position):
+            # 丢弃已处理过的录音块，返回包含该位置的录音块的采集时间
+            while len(capture_times) > 1 and capture_times[0][0] < position:
+                capture_times.popleft()
+            return capture_times[0][1] if capture_times else time.perf_counter()
+
+        try:
+            with sd.InputStream(channels=1, samplerate=SAMPLE_RATE, dtype="float32",
+                                blocksize=SAMPLE_RATE * BLOCK_MS // 1000, callback=audio_callback):
+                logger.info("麦克风已打开，开始监听语音命令")
+                while not self._stop_event.is_set():
+                    if ring.wait(frame_size, timeout=0.5) < frame_size:
+                        continue
+                    # 落后太多时跳过旧音频，命令响应以最近的语音为准
+                    backlog = len(ring)
+                    if backlog > max_backlog:
+                        ring.consume(backlog - max_backlog)
+                    frame = np.concatenate(ring.views(frame_size))
+                    ring.consume(frame_size)
+                    captured_at = capture_time(ring.read_position)
+
+                    # VAD 门控：静音时不运行模型，只保留少量历史音频
+                    if vad.is_speech(frame):
+                        if silence_frames >= hangover_frames and pre_roll:
+                            self._handle_hits(self.spotter.accept(np.concatenate(pre_roll)), captured_at)
+                        pre_roll.clear()
+                        silence_frames = 0
+                    else:
+                        silence_frames += 1
+                        if silence_frames > hangover_frames:
+                            if silence_frames == hangover_frames + 1:
+                                # 一句话结束，丢弃模型中的残留状态
+                                self.spotter.reset()
+                            pre_roll.append(frame)
+                            continue
+
+                    self._handle_hits(self.spotter.accept(frame), captured_at)
+        except Exception as e:
+            logger.error(f"语音监听出错: {e}")
+
         logger.info("语音线程退出")
 
+    def _handle_hits(self, hits, captured_at):
+        for keyword, _ in hits:
+            self.last_latency_ms = (time.perf_counter() - captured_at) * 1000
+            logger.info(f"检测到语音命令: {keyword}（延迟 {self.last_latency_ms:.0f} ms）")
+            if self.command_callback:
+                self.command_callback(keyword)
+
     def start_listening(self):
+        # 热重启时会再次调用，需要先清除上次的停止标志
+        self._stop_event.clear()
         self.listen_thread = threading.Thread(target=self._listen_loop, daemon=True)
         self.listen_thread.start()
         logger.info("语音监听已启动")